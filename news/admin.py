@@ -1,15 +1,127 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Comment, News
-
-
-class CommentInline(admin.StackedInline):
-    model = Comment
-    extra = 0
+from .leaderboard import add_comments, remove_comments
+from .models import ArchivedComment, Comment, News
+from .search import filter_news
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
-    inlines = [
-        CommentInline,
-    ]
+    """
+    Комментарии не выводятся на странице новости: у популярной
+    новости их десятки тысяч. Ссылка ведёт в список CommentAdmin,
+    отфильтрованный по новости и разбитый на страницы.
+    """
+    list_display = ('title', 'date', 'comment_count', 'comments_link')
+    # Только поля из индексов news_date_id_idx и news_title_date_idx.
+    sortable_by = ('title', 'date')
+    date_hierarchy = 'date'
+    search_fields = ('title', 'text')
+    # Без второго COUNT(*) по всей таблице на каждой странице списка.
+    show_full_result_count = False
+    readonly_fields = ('comment_count', 'comments_link')
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищем по индексу FTS5, а не LIKE по всей таблице."""
+        return filter_news(queryset, search_term), False
+
+    @admin.display(description='Комментарии')
+    def comments_link(self, news):
+        if news.pk is None:
+            return '—'
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">Открыть список</a>',
+            url, news.pk,
+        )
+
+
+class BaseCommentAdmin(admin.ModelAdmin):
+    """
+    Комментарии одной новости (?news__id__exact=...) выбираются
+    и сортируются по индексу (news, created) своей таблицы.
+
+    Удаление здесь меняет счётчик новости и таблицу самых
+    обсуждаемых так же, как на сайте.
+    """
+    list_display = ('__str__', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    ordering = ('-created', '-id')
+    sortable_by = ('created',)
+    # Не date_hierarchy: для неё SQLite вызывает функцию усечения даты
+    # на каждой строке новости, а фильтр по периоду — диапазон в индексе.
+    list_filter = ('created',)
+    search_fields = ('author__username',)
+    show_full_result_count = False
+    # Выпадающие списки со всеми новостями и пользователями не нужны.
+    raw_id_fields = ('news', 'author')
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Ищем по точному имени автора: по уникальному индексу username
+        и индексу author_id, а не LIKE по всем комментариям.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(author__username=search_term), False
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        deleted, _ = obj.delete()
+        if deleted:
+            News.objects.filter(
+                pk=obj.news_id
+            ).change_comment_count(-deleted)
+            remove_comments([(obj.news_id, obj.created)])
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        """Счётчик каждой затронутой новости меняется одним UPDATE."""
+        counts = list(
+            queryset.order_by().values('news').annotate(total=Count('pk'))
+        )
+        # Действие применяется к выбранным на странице, их немного.
+        removed = list(queryset.values_list('news_id', 'created'))
+        queryset.delete()
+        for item in counts:
+            News.objects.filter(
+                pk=item['news']
+            ).change_comment_count(-item['total'])
+        remove_comments(removed)
+
+
+@admin.register(Comment)
+class CommentAdmin(BaseCommentAdmin):
+    """Создание здесь тоже учитывается в счётчике и таблице."""
+
+    def get_readonly_fields(self, request, obj=None):
+        """Переносить комментарий к другой новости нельзя."""
+        if obj is None:
+            return ()
+        return ('news',)
+
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        news = News.objects.filter(pk=obj.news_id)
+        if change:
+            news.touch()
+        else:
+            news.change_comment_count(1)
+            add_comments({obj.news_id: 1})
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(BaseCommentAdmin):
+    """Архив только для чтения, но неуместный комментарий можно удалить."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
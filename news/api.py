@@ -0,0 +1,112 @@
+"""
+JSON API только для чтения: лента новостей и комментарии к новости.
+
+ETag и Last-Modified строятся по полю News.modified, которое меняется
+при любой правке новости и её комментариев. Поэтому условный GET
+стоит одного запроса по индексу, а ответ 304 отдаётся без сериализации.
+
+У ленты Last-Modified нет: наибольшее modified новостей на ней
+уменьшается, если удалить самую свежую из них, и по If-Modified-Since
+клиент получил бы 304 на изменившуюся ленту. Её проверяет только ETag.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition, require_GET
+
+from .models import News
+from .pagination import get_comment_page
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def feed_etag(request):
+    """Хэш (id, modified, comment_count) каждой новости ленты."""
+    return make_etag(list(
+        News.objects.values_list('pk', 'modified', 'comment_count')[
+            :settings.NEWS_COUNT_ON_HOME_PAGE
+        ]
+    ))
+
+
+def get_news_state(request, pk):
+    """Состояние одной новости: (modified, comment_count) или None."""
+    if not hasattr(request, 'news_state'):
+        request.news_state = News.objects.filter(pk=pk).values_list(
+            'modified', 'comment_count'
+        ).first()
+    return request.news_state
+
+
+def comments_etag(request, pk):
+    state = get_news_state(request, pk)
+    if state is None:
+        return None
+    return make_etag(pk, state, request.GET.get('after'))
+
+
+def comments_last_modified(request, pk):
+    state = get_news_state(request, pk)
+    return state and state[0]
+
+
+def serialize_news(news):
+    return {
+        'id': news.pk,
+        'title': news.title,
+        'text': news.text,
+        'date': news.date.isoformat(),
+        'comment_count': news.comment_count,
+        'url': reverse('news:detail', kwargs={'pk': news.pk}),
+        'comments_url': reverse('news:api_comments', kwargs={'pk': news.pk}),
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+@require_GET
+@condition(etag_func=feed_etag)
+def news_feed(request):
+    """Последние новости — те же, что на главной странице."""
+    news_list = News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    return JsonResponse(
+        {'results': [serialize_news(news) for news in news_list]}
+    )
+
+
+@require_GET
+@condition(etag_func=comments_etag, last_modified_func=comments_last_modified)
+def news_comments(request, pk):
+    """Комментарии к новости, по странице за запрос."""
+    news = get_object_or_404(News, pk=pk)
+    try:
+        comments, next_cursor = get_comment_page(
+            news,
+            settings.COMMENTS_COUNT_ON_PAGE,
+            request.GET.get('after'),
+        )
+    except ValueError as error:
+        raise BadRequest(error)
+    next_url = None
+    if next_cursor is not None:
+        next_url = (
+            reverse('news:api_comments', kwargs={'pk': pk})
+            + f'?after={next_cursor}'
+        )
+    return JsonResponse({
+        'results': [serialize_comment(comment) for comment in comments],
+        'next': next_url,
+    })
@@ -0,0 +1,72 @@
+"""
+Асинхронные версии страниц для чтения.
+
+ORM в Django 3.2 синхронный, поэтому запросы к базе и рендеринг шаблона
+выполняются за один переход в пул потоков. Закэшированная главная
+страница отдаётся анонимам прямо в цикле событий, без пула потоков.
+Под WSGI эти представления работают без изменений: Django сам запускает
+для них цикл событий.
+
+Выигрыш есть только под ASGI и только потому, что middleware проекта
+(yanews/middleware.py) умеют работать в асинхронной цепочке. Хуки
+process_view, в том числе у CsrfViewMiddleware, Django всё равно
+вызывает в пуле потоков, так что на запрос уходит несколько переходов.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, HttpResponseNotAllowed
+
+from .cache import get_feed_cache, get_feed_page_key, get_feed_version
+from .views import NewsComment, NewsDetail, NewsList
+
+news_list_view = NewsList.as_view()
+news_detail_view = NewsDetail.as_view()
+news_comment_view = NewsComment.as_view()
+
+
+@sync_to_async
+def render_view(view, request, *args, **kwargs):
+    """
+    Вызывает синхронное представление и сразу рендерит ответ.
+
+    Рендеринг тоже может обращаться к базе (например, за пользователем
+    для шапки), поэтому он выполняется в том же потоке.
+    """
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def get_cached_anonymous_feed(request):
+    """
+    Кэш главной для запроса без сессии.
+
+    Без куки сессии пользователь заведомо анонимный, и это известно
+    без обращения к базе.
+    """
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return None
+    key = get_feed_page_key(get_feed_version(), AnonymousUser())
+    return get_feed_cache().get(key)
+
+
+async def news_list(request, *args, **kwargs):
+    """Асинхронная версия NewsList."""
+    if request.method == 'GET':
+        content = get_cached_anonymous_feed(request)
+        if content is not None:
+            return HttpResponse(content)
+    return await render_view(news_list_view, request, *args, **kwargs)
+
+
+async def news_detail(request, *args, **kwargs):
+    """Асинхронная версия NewsDetailView: чтение и отправка комментария."""
+    if request.method in ('GET', 'HEAD'):
+        view = news_detail_view
+    elif request.method == 'POST':
+        view = news_comment_view
+    else:
+        return HttpResponseNotAllowed(('GET', 'HEAD', 'POST'))
+    return await render_view(view, request, *args, **kwargs)
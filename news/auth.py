@@ -0,0 +1,51 @@
+"""
+Кэш пользователей для AuthenticationMiddleware.
+
+Без него каждый запрос авторизованного читателя начинается с SELECT
+из auth_user. Пользователь кладётся в кэш при входе и удаляется
+из него при выходе и после любого сохранения или удаления строки,
+в том числе после смены пароля.
+
+Удаление видно другим процессам, только если кэш
+AUTH_USER_CACHE_ALIAS у них общий; с LocMemCache не пройдёт
+manage.py check --deploy (news/checks.py).
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def get_user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def get_user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def remember_user(user):
+    get_user_cache().set(
+        get_user_cache_key(user.pk), user, settings.AUTH_USER_CACHE_TIMEOUT
+    )
+
+
+def forget_user(user_id):
+    get_user_cache().delete(get_user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который ищет пользователя сессии сначала в кэше.
+
+    В закэшированном объекте есть и хэш пароля, поэтому проверка
+    сессии после смены пароля работает как обычно.
+    """
+
+    def get_user(self, user_id):
+        user = get_user_cache().get(get_user_cache_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                remember_user(user)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,50 @@
+"""
+SQL-запросы авторизованного читателя до и после кэширования
+сессий и пользователей:
+
+    python manage.py benchmark_auth_cache --news 100 --iterations 20
+"""
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from news.auth import forget_user
+
+from .seed import seed
+from .suite import measure
+
+# «До»: сессии и пользователи читаются из базы на каждый запрос.
+# «После»: настройки проекта как есть.
+CONFIGURATIONS = {
+    'before': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend'
+        ],
+    },
+    'after': {},
+}
+
+
+def run_comparison(news_count, comments_per_news, iterations):
+    """Замеряет главную и страницу новости в обеих конфигурациях."""
+    _, news_ids = seed(news_count, comments_per_news, users_count=10)
+    reader = get_user_model().objects.create(username='bench-reader')
+    urls = {
+        'home': reverse('news:home'),
+        'detail': reverse('news:detail', args=(news_ids[0],)),
+    }
+    result = {}
+    for name, overrides in CONFIGURATIONS.items():
+        with override_settings(**overrides):
+            forget_user(reader.pk)
+            client = Client()
+            client.force_login(reader)
+            routes = {}
+            for route, url in urls.items():
+                # Первый запрос наполняет кэши, замеряется устоявшийся режим.
+                client.get(url)
+                routes[route] = measure(lambda: client.get(url), iterations)
+            result[name] = routes
+    return result
@@ -0,0 +1,142 @@
+"""
+Общий каркас замеров одновременной записи комментариев.
+
+Каждый вариант замера (бэкенд базы в stress, режим буфера в ingest)
+выполняется в отдельном процессе со своей временной базой: настройки
+Django меняются до django.setup(), а варианты не делят одну базу.
+Модуль замера задаёт варианты, работу одного процесса и отчёт,
+а разбор аргументов, запуск процессов и потоков берёт отсюда.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# К тексту добавляется номер, иначе повторы отклонит NewsComment.
+COMMENT_TEXT = 'Комментарий из замера записи'
+
+
+def comment_data(user, index):
+    """Данные формы index-го комментария пользователя user."""
+    return {'text': f'{COMMENT_TEXT} {user.pk}-{index}'}
+
+
+def setup_worker(path, threads, database=None, **overrides):
+    """
+    Готовит процесс замера: настройки, миграции, новость и пользователи.
+
+    database дополняет настройки базы, overrides заменяют остальные
+    настройки проекта. Возвращает новость и по пользователю на поток.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    import django
+    from django.conf import settings
+
+    # Настройки меняются до первого подключения к базе.
+    settings.DATABASES['default'].update(database or {}, NAME=path)
+    # Нагрузку создают несколько пользователей с одного IP.
+    settings.RATE_LIMIT = {'ENABLED': False}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from news.models import News
+
+    setup_test_environment()
+    call_command('migrate', verbosity=0)
+    news = News.objects.create(title='Замер записи', text='Текст')
+    users = [
+        get_user_model().objects.create(username=f'writer-{index}')
+        for index in range(threads)
+    ]
+    connection.close()
+    return news, users
+
+
+def run_threads(users, post_comments):
+    """
+    Вызывает post_comments(client, user) в потоке на каждого пользователя.
+
+    Клиенты входят заранее, потоки стартуют одновременно и закрывают
+    свои подключения к базе. Возвращает результаты в порядке users.
+    """
+    from django.db import connection
+    from django.test import Client
+
+    barrier = threading.Barrier(len(users))
+
+    def run(user):
+        client = Client()
+        client.force_login(user)
+        barrier.wait()
+        try:
+            return post_comments(client, user)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(users)) as executor:
+        return list(executor.map(run, users))
+
+
+def run_variant(module, variant, **options):
+    """Выполняет вариант модуля замера в отдельном процессе."""
+    with tempfile.TemporaryDirectory() as directory:
+        command = [
+            sys.executable, '-m', module, '--worker', variant,
+            '--database', os.path.join(directory, 'db.sqlite3'),
+        ]
+        for name, value in options.items():
+            command += [f'--{name.replace("_", "-")}', str(value)]
+        completed = subprocess.run(
+            command, capture_output=True, text=True, check=True,
+        )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main(module, doc, variants, run_worker, print_report, choice,
+         **defaults):
+    """
+    Точка входа модуля замера module с описанием doc.
+
+    defaults — целые параметры замера с их значениями по умолчанию,
+    они передаются run_worker(variant, path, **options) по имени.
+    Варианты выбираются опцией --<choice>, по умолчанию все.
+    Процесс с --worker выполняет один вариант и печатает результат
+    в JSON, без неё — собирает отчёт {вариант: результат} и отдаёт его
+    print_report, который возвращает код выхода.
+    """
+    parser = argparse.ArgumentParser(
+        description=doc.strip().splitlines()[0]
+    )
+    for name, default in defaults.items():
+        parser.add_argument(
+            f'--{name.replace("_", "-")}', type=int, default=default
+        )
+    parser.add_argument(
+        f'--{choice}', dest='variants', choices=variants, action='append',
+        help='Какие варианты замерять; по умолчанию все.',
+    )
+    parser.add_argument('--worker', choices=variants, help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    options = {name: getattr(args, name) for name in defaults}
+
+    if args.worker:
+        result = run_worker(args.worker, args.database, **options)
+        print(json.dumps(result))
+        return 0
+
+    report = {
+        variant: run_variant(module, variant, **options)
+        for variant in args.variants or variants
+    }
+    return print_report(report)
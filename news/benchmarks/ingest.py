@@ -0,0 +1,83 @@
+r"""
+Скорость записи комментариев с буфером COMMENT_INGEST и без него.
+
+Для каждого режима запускается отдельный процесс со своей временной
+базой: потоки отправляют комментарии к одной новости через тестовый
+клиент, после чего буфер дописывается до конца. Время записи включает
+этот последний сброс:
+
+    python -m news.benchmarks.ingest --threads 16 --posts 100
+"""
+import sys
+import time
+
+from .harness import comment_data, main, run_threads, run_variant, setup_worker
+
+MODES = ('sync', 'memory', 'table')
+
+
+def run_worker(mode, path, threads, posts, batch_size):
+    """Пишет комментарии из threads потоков через буфер режима mode."""
+    news, users = setup_worker(path, threads, COMMENT_INGEST={
+        'MODE': None if mode == 'sync' else mode,
+        'BATCH_SIZE': batch_size,
+        'MAX_DELAY': 0.2,
+    })
+
+    from django.urls import reverse
+
+    from news.ingest import get_comment_buffer
+    from news.models import Comment
+
+    url = reverse('news:detail', args=(news.pk,))
+
+    def post_comments(client, user):
+        return sum(
+            client.post(url, comment_data(user, index)).status_code == 302
+            for index in range(posts)
+        )
+
+    started = time.perf_counter()
+    accepted = sum(run_threads(users, post_comments))
+    accepted_at = time.perf_counter()
+    comment_buffer = get_comment_buffer()
+    if comment_buffer is not None:
+        comment_buffer.stop()
+        comment_buffer.flush()
+    finished = time.perf_counter()
+    news.refresh_from_db()
+    written = Comment.objects.count()
+    return {
+        'accepted': accepted,
+        'written': written,
+        'accepted_per_s': round(accepted / (accepted_at - started), 1),
+        'inserts_per_s': round(written / (finished - started), 1),
+        'consistent': written == news.comment_count == accepted,
+    }
+
+
+def run_mode(mode, threads, posts, batch_size):
+    """Запускает run_worker в отдельном процессе и возвращает результат."""
+    return run_variant(
+        'news.benchmarks.ingest', mode,
+        threads=threads, posts=posts, batch_size=batch_size,
+    )
+
+
+def print_report(report):
+    print(f'{"":8} {"принято/с":>10} {"записано/с":>11} {"записано":>9} '
+          f'{"счётчик":>12}')
+    for mode, result in report.items():
+        print(
+            f'{mode:8} {result["accepted_per_s"]:10.1f} '
+            f'{result["inserts_per_s"]:11.1f} {result["written"]:9} '
+            f'{"ок" if result["consistent"] else "РАСХОЖДЕНИЕ":>12}'
+        )
+    return 0 if all(result['consistent'] for result in report.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(
+        'news.benchmarks.ingest', __doc__, MODES, run_worker, print_report,
+        'mode', threads=16, posts=100, batch_size=100,
+    ))
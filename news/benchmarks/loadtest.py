@@ -0,0 +1,100 @@
+r"""
+Нагрузочный тест синхронных и асинхронных страниц для чтения.
+
+Поднимите два сервера — с синхронными и с асинхронными представлениями:
+
+    uvicorn yanews.asgi:application --port 8000
+    NEWS_ASYNC_READ_VIEWS=1 uvicorn yanews.asgi:application --port 8001
+
+и сравните их:
+
+    python -m news.benchmarks.loadtest \
+        --target sync=http://127.0.0.1:8000/ \
+        --target async=http://127.0.0.1:8001/ \
+        --requests 2000 --concurrency 50
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def fetch(url, timeout):
+    """Возвращает (длительность запроса в секундах, успешен ли он)."""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run(url, requests, concurrency, timeout):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Прогрев: кэши, соединения с базой, пулы потоков.
+        list(executor.map(lambda _: fetch(url, timeout), range(concurrency)))
+        started = time.perf_counter()
+        results = list(
+            executor.map(lambda _: fetch(url, timeout), range(requests))
+        )
+        elapsed = time.perf_counter() - started
+    latencies = sorted(duration for duration, _ in results)
+    return {
+        'url': url,
+        'requests': requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'rps': requests / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def parse_target(value):
+    name, separator, url = value.partition('=')
+    if not separator or not url:
+        raise argparse.ArgumentTypeError('ожидается ИМЯ=URL')
+    return name, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--target', type=parse_target, action='append', required=True,
+        help='ИМЯ=URL страницы; можно указать несколько раз.',
+    )
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument(
+        '--json', action='store_true', help='Вывести результат в JSON.'
+    )
+    args = parser.parse_args()
+
+    report = {
+        name: run(url, args.requests, args.concurrency, args.timeout)
+        for name, url in args.target
+    }
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    print(f'{"":10} {"rps":>10} {"p50, мс":>10} {"p99, мс":>10} {"ошибки":>8}')
+    for name, result in report.items():
+        print(
+            f'{name:10} {result["rps"]:10.1f} {result["p50_ms"]:10.2f} '
+            f'{result["p99_ms"]:10.2f} {result["errors"]:8}'
+        )
+
+
+if __name__ == '__main__':
+    main()
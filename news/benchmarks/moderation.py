@@ -0,0 +1,72 @@
+"""
+Микробенчмарк проверки стоп-слов.
+
+Сравнивает прежний подход (по одному поиску подстроки на каждое слово)
+со скомпилированным фильтром на длинных комментариях:
+
+    python -m news.benchmarks.moderation --words 5000 --length 10000
+"""
+import argparse
+import random
+import timeit
+
+from news.moderation import BadWordsFilter
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def naive_find_all(words, text):
+    """Прежняя проверка: отдельный проход по тексту для каждого слова."""
+    lowered_text = text.lower()
+    return [word for word in words if word in lowered_text]
+
+
+def make_words(count, rng):
+    return [
+        ''.join(rng.choices(ALPHABET, k=rng.randint(5, 10)))
+        for _ in range(count)
+    ]
+
+
+def make_text(length, rng):
+    words = []
+    size = 0
+    while size < length:
+        word = ''.join(rng.choices(ALPHABET, k=rng.randint(2, 9)))
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--length', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = make_words(args.words, rng)
+    text = make_text(args.length, rng)
+
+    started = timeit.default_timer()
+    bad_words_filter = BadWordsFilter(words)
+    build_time = timeit.default_timer() - started
+
+    naive = min(timeit.repeat(
+        lambda: naive_find_all(words, text), number=1, repeat=args.repeat
+    ))
+    compiled = min(timeit.repeat(
+        lambda: bad_words_filter.find_all(text),
+        number=1, repeat=args.repeat
+    ))
+    print(f'слов: {args.words}, длина текста: {args.length}')
+    print(f'сборка фильтра:       {build_time * 1000:9.3f} мс')
+    print(f'поиск подстрок:       {naive * 1000:9.3f} мс')
+    print(f'скомпилированный:     {compiled * 1000:9.3f} мс')
+    print(f'ускорение:            {naive / compiled:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
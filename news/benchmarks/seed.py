@@ -0,0 +1,66 @@
+"""Быстрое наполнение базы пользователями, новостями и комментариями."""
+from datetime import date, timedelta
+from itertools import cycle, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from news.cache import invalidate_feed
+from news.models import Comment, News, text_fingerprint
+
+USERNAME_PREFIX = 'bench-user-'
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def seed(news_count, comments_per_news, users_count, batch_size=1000):
+    """
+    Создаёт данные через bulk_create и возвращает (id пользователей, id
+    новостей). Счётчики комментариев пересчитываются одним UPDATE.
+    """
+    User = get_user_model()
+    # Хэшировать пароль для каждого пользователя слишком долго.
+    password = make_password(None)
+    for batch in batches((
+        User(username=f'{USERNAME_PREFIX}{index}', password=password)
+        for index in range(users_count)
+    ), batch_size):
+        User.objects.bulk_create(batch)
+    user_ids = list(User.objects.filter(
+        username__startswith=USERNAME_PREFIX
+    ).values_list('pk', flat=True))
+
+    today = date.today()
+    for batch in batches((
+        News(
+            title=f'Новость {index}',
+            text='Текст новости для замеров. ' * 20,
+            date=today - timedelta(days=index % 365),
+        )
+        for index in range(news_count)
+    ), batch_size):
+        News.objects.bulk_create(batch)
+    news_ids = list(News.objects.values_list('pk', flat=True))
+
+    authors = cycle(user_ids)
+    for batch in batches((
+        Comment(
+            news_id=news_id,
+            author_id=next(authors),
+            text=f'Комментарий {index} для замеров.',
+            fingerprint=text_fingerprint(f'Комментарий {index} для замеров.'),
+        )
+        for news_id in news_ids
+        for index in range(comments_per_news)
+    ), batch_size):
+        Comment.objects.bulk_create(batch)
+    News.objects.rebuild_comment_counts()
+    invalidate_feed()
+    return user_ids, news_ids
@@ -0,0 +1,119 @@
+r"""
+Стресс-тест одновременной записи комментариев в SQLite.
+
+Для каждого бэкенда запускается отдельный процесс со своей временной
+базой: потоки отправляют комментарии в NewsDetailView через тестовый
+клиент и через раз удаляют свой предыдущий комментарий. Удаление
+сначала читает строку, а потом пишет — на таких транзакциях и
+возникает «database is locked». Процесс завершается с ошибкой,
+если настроенный бэкенд допустил такие ошибки или оказался хуже
+стандартного по числу ошибок, записей или скорости:
+
+    python -m news.benchmarks.stress --threads 16 --posts 50
+"""
+import sys
+import time
+
+from .harness import comment_data, main, run_threads, run_variant, setup_worker
+
+# Бэкенды для сравнения: стандартный и yanews/sqlite/base.py.
+BACKENDS = {
+    'plain': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+    'tuned': {
+        'ENGINE': 'yanews.sqlite',
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    },
+}
+
+
+def run_worker(backend, path, threads, posts):
+    """Пишет и удаляет комментарии из threads потоков в базу path."""
+    news, users = setup_worker(path, threads, database=BACKENDS[backend])
+
+    from django.db import OperationalError
+    from django.urls import reverse
+
+    from news.models import Comment
+
+    url = reverse('news:detail', args=(news.pk,))
+
+    def post_comments(client, user):
+        created = deleted = errors = 0
+        for index in range(posts):
+            try:
+                response = client.post(url, comment_data(user, index))
+                created += response.status_code == 302
+                if index % 2:
+                    comment = Comment.objects.filter(author=user).latest('pk')
+                    response = client.post(
+                        reverse('news:delete', args=(comment.pk,))
+                    )
+                    deleted += response.status_code == 302
+            except OperationalError:
+                errors += 1
+        return created, deleted, errors
+
+    started = time.perf_counter()
+    results = run_threads(users, post_comments)
+    elapsed = time.perf_counter() - started
+    created, deleted, errors = map(sum, zip(*results))
+    news.refresh_from_db()
+    return {
+        'created': created,
+        'deleted': deleted,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'writes_per_s': round((created + deleted) / elapsed, 1),
+        # Счётчик новости совпадает с числом комментариев в базе.
+        'consistent': Comment.objects.count() == news.comment_count,
+    }
+
+
+def run_backend(backend, threads, posts):
+    """Запускает run_worker в отдельном процессе и возвращает результат."""
+    return run_variant(
+        'news.benchmarks.stress', backend, threads=threads, posts=posts
+    )
+
+
+def is_not_worse(tuned, plain):
+    """Настроенный бэкенд записал не меньше и не медленнее стандартного."""
+    return (
+        tuned['errors'] <= plain['errors']
+        and tuned['created'] + tuned['deleted']
+        >= plain['created'] + plain['deleted']
+        and tuned['writes_per_s'] >= plain['writes_per_s']
+    )
+
+
+def print_report(report):
+    print(f'{"":8} {"записей/с":>10} {"ошибки":>8} {"создано":>8} '
+          f'{"удалено":>8} {"счётчик":>12}')
+    for backend, result in report.items():
+        print(
+            f'{backend:8} {result["writes_per_s"]:10.1f} '
+            f'{result["errors"]:8} {result["created"]:8} '
+            f'{result["deleted"]:8} '
+            f'{"ок" if result["consistent"] else "РАСХОЖДЕНИЕ":>12}'
+        )
+    tuned = report.get('tuned')
+    if tuned is None:
+        return 0
+    failed = tuned['errors'] > 0 or not tuned['consistent']
+    plain = report.get('plain')
+    if plain is not None:
+        if plain['writes_per_s']:
+            print(
+                'ускорение: '
+                f'{tuned["writes_per_s"] / plain["writes_per_s"]:.2f}x'
+            )
+        # Настройки бэкенда не должны ухудшать ни одну из метрик.
+        failed = failed or not is_not_worse(tuned, plain)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(
+        'news.benchmarks.stress', __doc__, BACKENDS, run_worker,
+        print_report, 'backend', threads=16, posts=50,
+    ))
@@ -0,0 +1,167 @@
+"""
+Замеры всех маршрутов news через тестовый клиент.
+
+Для каждого маршрута считаются p50/p95 времени ответа, число
+SQL-запросов и пиковая память Python на один запрос.
+"""
+import statistics
+import time
+import tracemalloc
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from news.cache import invalidate_feed
+from news.models import Comment, News
+
+from .seed import seed
+
+FORM_DATA = {'text': 'Комментарий из замеров'}
+# Насколько метрика может вырасти относительно эталона без тревоги.
+DEFAULT_TOLERANCE = 0.25
+# Абсолютный запас для времени: доли миллисекунды — это шум.
+LATENCY_SLACK_MS = 1.0
+# Метрики, которые сравниваются с эталоном.
+METRICS = ('p50_ms', 'p95_ms', 'queries', 'peak_memory_kb')
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(make_request, iterations):
+    """Замеряет маршрут: iterations запросов и ещё один под tracemalloc."""
+    latencies = []
+    queries = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = make_request()
+            latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'Маршрут ответил {response.status_code}: {response}'
+            )
+        queries.append(len(context))
+    # tracemalloc замедляет код, поэтому память меряется отдельно.
+    tracemalloc.start()
+    try:
+        make_request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'queries': max(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def build_routes(news_id, reader, iterations):
+    """Возвращает словарь «имя замера -> функция, делающая запрос»."""
+    anonymous = Client()
+    reader_client = Client()
+    reader_client.force_login(reader)
+    home_url = reverse('news:home')
+    detail_url = reverse('news:detail', args=(news_id,))
+    thread_url = reverse('news:thread', args=(news_id,))
+    own_comment = Comment.objects.create(
+        news_id=news_id, author=reader, text='Комментарий для правки'
+    )
+    edit_url = reverse('news:edit', args=(own_comment.pk,))
+    # Каждое удаление — свой комментарий, плюс один на замер памяти.
+    comments_to_delete = [
+        Comment.objects.create(
+            news_id=news_id, author=reader, text='Комментарий для удаления'
+        ).pk
+        for _ in range(iterations + 1)
+    ]
+    News.objects.filter(pk=news_id).change_comment_count(
+        len(comments_to_delete) + 1
+    )
+
+    def home():
+        invalidate_feed()
+        return anonymous.get(home_url)
+
+    # Новый текст на каждый запрос, иначе повтор отклонит NewsComment.
+    comment_texts = (f'{FORM_DATA["text"]} {index}' for index in count())
+
+    def create_comment():
+        return reader_client.post(detail_url, {'text': next(comment_texts)})
+
+    def thread():
+        response = anonymous.get(thread_url)
+        # Поток читается по частям, как его читал бы клиент.
+        for _ in response.streaming_content:
+            pass
+        return response
+
+    def delete_comment():
+        url = reverse('news:delete', args=(comments_to_delete.pop(),))
+        return reader_client.post(url)
+
+    return {
+        'home': home,
+        'home_cached': lambda: anonymous.get(home_url),
+        'detail': lambda: anonymous.get(detail_url),
+        'detail_authenticated': lambda: reader_client.get(detail_url),
+        'thread': thread,
+        'comment_create': create_comment,
+        'comment_edit': lambda: reader_client.post(edit_url, FORM_DATA),
+        'comment_delete': delete_comment,
+    }
+
+
+# Замеры многократно пишут комментарии от одного пользователя.
+@override_settings(RATE_LIMIT={'ENABLED': False})
+def run_suite(news_count, comments_per_news, users_count, iterations):
+    """Наполняет базу и замеряет все маршруты."""
+    params = {
+        'news': news_count,
+        'comments_per_news': comments_per_news,
+        'users': users_count,
+        'iterations': iterations,
+    }
+    _, news_ids = seed(news_count, comments_per_news, users_count)
+    reader = get_user_model().objects.create(username='bench-reader')
+    routes = build_routes(news_ids[0], reader, iterations)
+    return {
+        'params': params,
+        'routes': {
+            name: measure(make_request, iterations)
+            for name, make_request in routes.items()
+        },
+    }
+
+
+def compare(result, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Сравнивает результат с эталоном и возвращает список регрессий.
+
+    Число запросов не должно расти вовсе, остальные метрики —
+    не больше чем на tolerance; время — ещё и с запасом LATENCY_SLACK_MS.
+    """
+    regressions = []
+    for name, metrics in result['routes'].items():
+        expected = baseline.get('routes', {}).get(name)
+        if expected is None:
+            continue
+        for metric in METRICS:
+            allowed = expected[metric]
+            if metric != 'queries':
+                allowed *= 1 + tolerance
+            if metric.endswith('_ms'):
+                allowed = max(allowed, expected[metric] + LATENCY_SLACK_MS)
+            if metrics[metric] > allowed:
+                regressions.append(
+                    f'{name}.{metric}: {metrics[metric]} '
+                    f'(эталон {expected[metric]})'
+                )
+    return regressions
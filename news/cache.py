@@ -0,0 +1,127 @@
+"""Кэш отрендеренной главной страницы и отдельных комментариев."""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+FEED_VERSION_KEY = 'news:feed:version'
+
+
+def get_feed_cache():
+    return caches[settings.NEWS_FEED_CACHE_ALIAS]
+
+
+def get_feed_version():
+    """
+    Текущая версия ленты — часть всех ключей кэша главной страницы.
+
+    Версия берётся из часов, поэтому после перезапуска или очистки
+    кэша она не совпадёт ни с одной из прежних.
+    """
+    cache = get_feed_cache()
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        cache.add(FEED_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def invalidate_feed():
+    """Меняет версию ленты: все закэшированные варианты устаревают."""
+    get_feed_cache().set(FEED_VERSION_KEY, time.time_ns(), None)
+
+
+def get_feed_page_key(version, user):
+    """Анонимы делят одну копию, пользователи получают свою из-за шапки."""
+    if user.is_authenticated:
+        return f'news:feed:{version}:user:{user.pk}'
+    return f'news:feed:{version}:anonymous'
+
+
+def get_feed_items_key(version):
+    return f'news:feed:{version}:items'
+
+
+def remember_feed_items(version, news_list):
+    """
+    Запоминает, какие новости попали в ленту этой версии.
+
+    По этим данным обработчики сигналов решают, затрагивает ли
+    изменение закэшированную страницу.
+    """
+    news_list = list(news_list)
+    news_ids = [news.pk for news in news_list]
+    last = news_list[-1] if news_list else None
+    boundary = (last.date, last.pk) if (
+        last is not None
+        and len(news_list) >= settings.NEWS_COUNT_ON_HOME_PAGE
+    ) else None
+    get_feed_cache().set(
+        get_feed_items_key(version),
+        (news_ids, boundary),
+        settings.NEWS_FEED_CACHE_TIMEOUT,
+    )
+
+
+def get_feed_items():
+    """
+    Возвращает пару (id новостей в ленте, граница ленты)
+    или None, если лента текущей версии ещё не закэширована.
+
+    Граница — (date, id) последней новости ленты; None означает,
+    что лента неполная и в неё попадёт любая новая новость.
+    """
+    return get_feed_cache().get(get_feed_items_key(get_feed_version()))
+
+
+def get_comment_cache():
+    return caches[settings.COMMENT_FRAGMENT_CACHE_ALIAS]
+
+
+def get_comment_fragment_key(comment):
+    """Ключ зависит от версии комментария: правка даёт новый ключ."""
+    version = int(comment.modified.timestamp() * 1_000_000)
+    return f'news:comment:{comment.pk}:{version}'
+
+
+def render_comment_fragments(comments):
+    """
+    Кладёт в comment.fragment отрендеренное тело каждого комментария.
+
+    Готовые фрагменты читаются из кэша одним get_many. Авторы
+    загружаются одним запросом и только для промахов, поэтому
+    комментарии можно выбирать без JOIN с пользователями.
+    """
+    cache = get_comment_cache()
+    keys = {comment.pk: get_comment_fragment_key(comment)
+            for comment in comments}
+    cached = cache.get_many(keys.values())
+    missing = [
+        comment for comment in comments if keys[comment.pk] not in cached
+    ]
+    prefetch_related_objects(missing, 'author')
+    rendered = {}
+    for comment in missing:
+        rendered[keys[comment.pk]] = render_to_string(
+            'includes/comment.html', {'comment': comment}
+        )
+    cache.set_many(rendered, settings.COMMENT_FRAGMENT_CACHE_TIMEOUT)
+    for comment in comments:
+        key = keys[comment.pk]
+        comment.fragment = mark_safe(
+            cached[key] if key in cached else rendered[key]
+        )
+    return comments
+
+
+def forget_comment_fragment(comment):
+    """
+    Удаляет фрагмент прежней версии комментария.
+
+    Новая версия и так получит другой ключ; удаление лишь освобождает
+    место в кэше, не дожидаясь истечения срока.
+    """
+    get_comment_cache().delete(get_comment_fragment_key(comment))
@@ -0,0 +1,87 @@
+"""
+Системные проверки: настройки для manage.py check --deploy
+и схема базы для manage.py check --database.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+from django.db import connections
+
+from .models import News
+from .search import FTS_TABLE
+
+# Триггеры из миграций 0006_news_fts и 0009_archived_comment.
+FTS_TRIGGERS = (
+    'news_news_fts_insert', 'news_news_fts_delete', 'news_news_fts_update'
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_auth_caches(app_configs, **kwargs):
+    """
+    Пользователи и сессии должны кэшироваться в общем для всех
+    процессов кэше.
+
+    Смену пароля, блокировку и выход из системы видит только процесс,
+    который их обработал: он удаляет запись из своего LocMemCache,
+    а остальные ещё AUTH_USER_CACHE_TIMEOUT секунд пускают по старой
+    сессии.
+    """
+    aliases = {'AUTH_USER_CACHE_ALIAS': settings.AUTH_USER_CACHE_ALIAS}
+    if settings.SESSION_ENGINE.startswith(
+        'django.contrib.sessions.backends.cache'
+    ):
+        aliases['SESSION_CACHE_ALIAS'] = settings.SESSION_CACHE_ALIAS
+    return [
+        Error(
+            f'{setting} = {alias!r} указывает на LocMemCache, '
+            f'у каждого процесса сервера свой кэш.',
+            hint='Укажите общий кэш: Redis или Memcached.',
+            id='news.E001',
+        )
+        for setting, alias in aliases.items()
+        if isinstance(caches[alias], LocMemCache)
+    ]
+
+
+@register(Tags.database)
+def check_search_index_triggers(app_configs, databases=None, **kwargs):
+    """
+    Триггеры полнотекстового индекса на месте.
+
+    Добавляя столбец, SQLite пересоздаёт news_news, и триггеры пропадают
+    вместе со старой таблицей. Поиск при этом работает, но молча
+    перестаёт видеть новые и изменённые новости, поэтому миграция,
+    которая меняет news_news, должна вернуть их, как это делает
+    0009_archived_comment.
+    """
+    errors = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            continue
+        with connection.cursor() as cursor:
+            # До миграции 0006 индекса ещё нет, проверять нечего.
+            if FTS_TABLE not in connection.introspection.table_names(cursor):
+                continue
+            cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = %s",
+                [News._meta.db_table],
+            )
+            existing = {name for name, in cursor.fetchall()}
+        errors.extend(
+            Error(
+                f'В базе {alias!r} нет триггера {trigger}, индекс '
+                f'поиска {FTS_TABLE} отстаёт от таблицы новостей.',
+                hint=(
+                    'Верните триггеры в миграции, пересоздавшей '
+                    'news_news, и выполните manage.py '
+                    'rebuild_search_index.'
+                ),
+                id='news.E002',
+            )
+            for trigger in FTS_TRIGGERS if trigger not in existing
+        )
+    return errors
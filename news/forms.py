@@ -2,6 +2,7 @@ from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import BadWordsFilter
 
 BAD_WORDS = (
     'редиска',
@@ -9,6 +10,9 @@ BAD_WORDS = (
     # Дополните список на своё усмотрение.
 )
 WARNING = 'Не ругайтесь!'
+DUPLICATE_WARNING = 'Такой комментарий уже есть.'
+
+bad_words_filter = BadWordsFilter(BAD_WORDS)
 
 
 class CommentForm(ModelForm):
@@ -20,8 +24,9 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        found_words = bad_words_filter.find_all(text)
+        if found_words:
+            raise ValidationError(
+                WARNING, code='bad_words', params={'words': found_words}
+            )
         return text
@@ -0,0 +1,260 @@
+"""
+Буферизованная запись новых комментариев.
+
+Обычно NewsComment записывает каждый комментарий отдельной транзакцией
+с UPDATE счётчика новости. При всплеске комментариев к одной новости
+эти транзакции выстраиваются в очередь за одной строкой. В режиме
+буфера проверенные комментарии сначала накапливаются, а потом пишутся
+пачками: один bulk_create и один UPDATE счётчика на новость за пачку.
+
+Настройки — словарь COMMENT_INGEST:
+
+- MODE: None — писать сразу; 'memory' — буфер в памяти процесса,
+  при падении процесса незаписанные комментарии теряются; 'table' —
+  очередь в таблице PendingComment, переживает перезапуск;
+- BATCH_SIZE: сколько комментариев накопить до записи;
+- MAX_DELAY: раз во сколько секунд фоновый поток пишет то, что
+  накопилось; набранную пачку он пишет сразу. None — без фонового
+  потока: полную пачку пишет добавивший её запрос, остаток —
+  команда flush_comments.
+"""
+import atexit
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+
+from .cache import invalidate_feed
+from .leaderboard import add_comments
+from .models import Comment, News, PendingComment, text_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def drop_repeats(comments):
+    """
+    Заполняет отпечатки и оставляет первый из комментариев с одним
+    текстом от одного автора или к одной новости.
+    """
+    seen = set()
+    unique = []
+    for comment in comments:
+        comment.fingerprint = text_fingerprint(comment.text)
+        keys = {
+            ('author', comment.author_id, comment.fingerprint),
+            ('news', comment.news_id, comment.fingerprint),
+        }
+        if seen.isdisjoint(keys):
+            seen |= keys
+            unique.append(comment)
+    return unique
+
+
+def write_comments(comments):
+    """
+    Записывает пачку комментариев и обновляет счётчики новостей.
+
+    Комментарии к новостям и от пользователей, удалённым, пока
+    комментарий ждал в буфере, отбрасываются, как и повторы внутри
+    пачки: с базой их сверяет NewsComment до постановки в буфер.
+    Возвращает число записанных комментариев.
+    """
+    comments = drop_repeats(comments)
+    news_ids = set(News.objects.filter(
+        pk__in={comment.news_id for comment in comments}
+    ).values_list('pk', flat=True))
+    author_ids = set(get_user_model().objects.filter(
+        pk__in={comment.author_id for comment in comments}
+    ).values_list('pk', flat=True))
+    comments = [
+        comment for comment in comments
+        if comment.news_id in news_ids and comment.author_id in author_ids
+    ]
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        counts = Counter(comment.news_id for comment in comments)
+        for news_id, count in counts.items():
+            News.objects.filter(pk=news_id).change_comment_count(count)
+        add_comments(counts)
+        # bulk_create не отправляет сигналы, сбрасывающие кэш ленты.
+        if comments:
+            transaction.on_commit(invalidate_feed)
+    return len(comments)
+
+
+class CommentBuffer(ABC):
+    """Общая часть буферов: запись по размеру пачки и по таймеру."""
+
+    def __init__(self, batch_size, max_delay):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.added = 0
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.wakeup = threading.Event()
+        self.flusher = None
+
+    def add(self, comment):
+        """Ставит проверенный, но не сохранённый комментарий в очередь."""
+        self.store(comment)
+        with self.lock:
+            self.added += 1
+            full = self.added >= self.batch_size
+            if full:
+                self.added = 0
+            if self.flusher is None and self.max_delay is not None:
+                self.flusher = threading.Thread(
+                    target=self.run, name='comment-flusher', daemon=True
+                )
+                self.flusher.start()
+        if not full:
+            return
+        if self.flusher is not None:
+            # Пачку записывает фоновый поток, а не запрос пользователя.
+            self.wakeup.set()
+        else:
+            self.flush()
+
+    def flush(self):
+        """Записывает всё, что накопилось; возвращает число комментариев."""
+        written = 0
+        with self.flush_lock:
+            while True:
+                batch_written = self.flush_batch()
+                if batch_written is None:
+                    return written
+                written += batch_written
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.wakeup.wait(self.max_delay)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Не удалось записать комментарии из буфера')
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.flusher is not None:
+            self.flusher.join()
+
+    @abstractmethod
+    def store(self, comment):
+        """Кладёт комментарий в очередь."""
+
+    @abstractmethod
+    def flush_batch(self):
+        """Пишет одну пачку; None, если очередь пуста."""
+
+
+class MemoryCommentBuffer(CommentBuffer):
+    """Очередь в памяти процесса: быстро, но не переживает падения."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queue = deque()
+        atexit.register(self.flush)
+
+    def store(self, comment):
+        self.queue.append(comment)
+
+    def stop(self):
+        super().stop()
+        atexit.unregister(self.flush)
+
+    def flush_batch(self):
+        batch = []
+        while self.queue and len(batch) < self.batch_size:
+            batch.append(self.queue.popleft())
+        if not batch:
+            return None
+        try:
+            return write_comments(batch)
+        except Exception:
+            # Пачка возвращается в начало очереди для следующей попытки.
+            self.queue.extendleft(reversed(batch))
+            raise
+
+
+class TableCommentBuffer(CommentBuffer):
+    """Очередь в таблице PendingComment: переживает перезапуск."""
+
+    def store(self, comment):
+        PendingComment.objects.create(
+            news_id=comment.news_id,
+            author_id=comment.author_id,
+            text=comment.text,
+            created=comment.created,
+        )
+
+    @transaction.atomic
+    def flush_batch(self):
+        # Несколько процессов могут разбирать очередь одновременно.
+        # SQLite не знает SELECT FOR UPDATE, и Django его опускает:
+        # там одну строку не заберут дважды только потому, что
+        # yanews.sqlite с transaction_mode IMMEDIATE начинает транзакцию
+        # с BEGIN IMMEDIATE и второй процесс ждёт блокировку записи
+        # ещё до чтения очереди.
+        pending = list(PendingComment.objects.select_for_update(
+            skip_locked=True
+        )[:self.batch_size])
+        if not pending:
+            return None
+        written = write_comments([
+            Comment(
+                news_id=item.news_id,
+                author_id=item.author_id,
+                text=item.text,
+                created=item.created,
+            )
+            for item in pending
+        ])
+        PendingComment.objects.filter(
+            pk__in=[item.pk for item in pending]
+        ).delete()
+        return written
+
+
+BUFFERS = {
+    'memory': MemoryCommentBuffer,
+    'table': TableCommentBuffer,
+}
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_comment_buffer():
+    """Буфер из настроек COMMENT_INGEST или None, если он выключен."""
+    global _buffer
+    config = settings.COMMENT_INGEST
+    if config.get('MODE') is None:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = BUFFERS[config['MODE']](
+                config.get('BATCH_SIZE', 100), config.get('MAX_DELAY')
+            )
+        return _buffer
+
+
+@receiver(setting_changed)
+def reset_comment_buffer(setting, **kwargs):
+    """После смены настроек (в тестах) буфер создаётся заново."""
+    global _buffer
+    if setting != 'COMMENT_INGEST':
+        return
+    with _buffer_lock:
+        if _buffer is not None:
+            _buffer.stop()
+        _buffer = None
@@ -0,0 +1,115 @@
+"""
+Самые обсуждаемые новости за периоды из LEADERBOARD_PERIODS.
+
+Считать комментарии GROUP BY на каждый показ главной — значит читать
+всю таблицу Comment. Вместо этого счётчики лежат в LeaderboardEntry:
+новый комментарий прибавляется ко всем периодам одним UPSERT,
+удалённый вычитается из периодов, в которые он попадал. Комментарии
+стареют и выпадают из периода без всяких событий, поэтому таблицу
+периодически пересчитывает команда rebuild_leaderboard.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ArchivedComment, Comment, LeaderboardEntry
+
+
+def get_period_start(period, now=None):
+    days = settings.LEADERBOARD_PERIODS[period]
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def get_leaders(period, limit):
+    """Лидеры периода с новостями — один запрос по leaderboard_top_idx."""
+    return list(LeaderboardEntry.objects.filter(
+        period=period, comment_count__gt=0
+    ).select_related('news').order_by('-comment_count', '-news_id')[:limit])
+
+
+def add_comments(counts):
+    """
+    Учитывает только что созданные комментарии: counts — словарь
+    «id новости -> сколько добавлено». Новый комментарий попадает
+    во все периоды.
+    """
+    rows = [
+        (period, news_id, count)
+        for news_id, count in counts.items() if count
+        for period in settings.LEADERBOARD_PERIODS
+    ]
+    if not rows:
+        return
+    table = connection.ops.quote_name(LeaderboardEntry._meta.db_table)
+    values = ', '.join(['(%s, %s, %s)'] * len(rows))
+    # ON CONFLICT есть в SQLite и PostgreSQL; строка периода создаётся
+    # или увеличивается атомарно, без чтения перед записью.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (period, news_id, comment_count) '
+            f'VALUES {values} ON CONFLICT (period, news_id) DO UPDATE '
+            f'SET comment_count = {table}.comment_count '
+            f'+ excluded.comment_count',
+            [value for row in rows for value in row],
+        )
+
+
+def remove_comments(comments):
+    """
+    Вычитает удалённые комментарии — пары (id новости, created) —
+    из тех периодов, в которые они ещё попадали.
+    """
+    now = timezone.now()
+    starts = {
+        period: get_period_start(period, now)
+        for period in settings.LEADERBOARD_PERIODS
+    }
+    counts = Counter(
+        (news_id, period)
+        for news_id, created in comments
+        for period, start in starts.items() if created >= start
+    )
+    # Одинаковое число во всех периодах — один UPDATE на новость.
+    periods_by_change = defaultdict(list)
+    for (news_id, period), count in counts.items():
+        periods_by_change[news_id, count].append(period)
+    for (news_id, count), periods in periods_by_change.items():
+        LeaderboardEntry.objects.filter(
+            news_id=news_id, period__in=periods
+        ).update(comment_count=Greatest(F('comment_count') - count, 0))
+
+
+def count_recent_comments(start):
+    """Комментарии новее start по новостям, вместе с архивом."""
+    counts = Counter()
+    for model in (Comment, ArchivedComment):
+        counts.update(dict(model.objects.filter(
+            created__gte=start
+        ).order_by().values_list('news').annotate(total=Count('pk'))))
+    return counts
+
+
+@transaction.atomic
+def rebuild_leaderboard():
+    """
+    Пересчитывает все периоды заново и возвращает число строк.
+
+    Таблица меняется в одной транзакции: читатели видят либо старые
+    счётчики, либо новые.
+    """
+    now = timezone.now()
+    entries = [
+        LeaderboardEntry(period=period, news_id=news_id, comment_count=count)
+        for period in settings.LEADERBOARD_PERIODS
+        for news_id, count in count_recent_comments(
+            get_period_start(period, now)
+        ).items()
+    ]
+    LeaderboardEntry.objects.all().delete()
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
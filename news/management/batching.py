@@ -0,0 +1,15 @@
+"""Порции для запросов с длинными списками IN в командах управления."""
+from itertools import islice
+
+# SQLite до 3.32 принимает не больше 999 параметров в одном запросе.
+# Запас оставлен на остальные условия того же запроса.
+MAX_IN_PARAMS = 900
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
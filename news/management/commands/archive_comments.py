@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from news.management.batching import MAX_IN_PARAMS, chunked
+from news.models import ArchivedComment, Comment, News
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит комментарии к старым новостям в архивную таблицу. '
+        'Страница новости читает архив сама.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int,
+            default=settings.COMMENT_ARCHIVE_AFTER_DAYS,
+            help='Архивировать новости старше стольких дней.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько комментариев переносить в одной транзакции.',
+        )
+
+    def handle(self, *args, older_than_days, chunk_size, **options):
+        cutoff = date.today() - timedelta(days=older_than_days)
+        old_comments = Comment.objects.filter(
+            news__date__lt=cutoff
+        ).order_by('pk')
+        moved = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(old_comments[:chunk_size])
+                if not chunk:
+                    break
+                ArchivedComment.objects.bulk_create(
+                    ArchivedComment(
+                        id=comment.pk,
+                        news_id=comment.news_id,
+                        author_id=comment.author_id,
+                        text=comment.text,
+                        created=comment.created,
+                        modified=comment.modified,
+                    )
+                    for comment in chunk
+                )
+                for news_ids in chunked(
+                    {comment.news_id for comment in chunk}, MAX_IN_PARAMS
+                ):
+                    News.objects.filter(
+                        pk__in=news_ids
+                    ).update(comments_archived=True)
+                self.delete_comments([comment.pk for comment in chunk])
+            moved += len(chunk)
+            self.stdout.write(f'Перенесено комментариев: {moved}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Архивация завершена, перенесено комментариев: {moved}.'
+        ))
+
+    def delete_comments(self, ids):
+        """
+        Удаляет перенесённые строки запросами DELETE по MAX_IN_PARAMS id.
+
+        Перенос не меняет ни одной страницы, поэтому загружать объекты
+        ради сигналов удаления (и сброса кэша ленты) не нужно.
+        """
+        table = connection.ops.quote_name(Comment._meta.db_table)
+        with connection.cursor() as cursor:
+            for part in chunked(ids, MAX_IN_PARAMS):
+                placeholders = ', '.join(['%s'] * len(part))
+                cursor.execute(
+                    f'DELETE FROM {table} WHERE id IN ({placeholders})', part
+                )
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment
+)
+
+from news.benchmarks.auth import run_comparison
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число SQL-запросов авторизованного читателя '
+        'с кэшем сессий и пользователей и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=100)
+        parser.add_argument('--comments-per-news', type=int, default=50)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            result = run_comparison(
+                options['news'],
+                options['comments_per_news'],
+                options['iterations'],
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики комментариев с фактическим числом комментариев. '
+        'Завершается с ошибкой, если найдены расхождения.'
+    )
+
+    def handle(self, *args, **options):
+        drift = News.objects.with_comment_count_drift().order_by('pk')
+        found = 0
+        for news in drift.iterator():
+            found += 1
+            self.stdout.write(
+                f'{news.pk} «{news.title}»: счётчик {news.comment_count}, '
+                f'комментариев {news.actual_comment_count}'
+            )
+        if found:
+            raise CommandError(
+                f'Счётчики разошлись у новостей: {found}. '
+                'Исправьте их командой rebuild_comment_counts.'
+            )
+        self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import tempfile
+from base64 import b64encode
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+# Сторонние файлы в static/vendor и их ожидаемые хэши (как в SRI).
+VENDORED_ASSETS = {
+    # Bootstrap 5.3.3, dist/css/bootstrap.min.css.
+    'vendor/bootstrap/bootstrap.min.css': (
+        'sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW'
+        '+ALEwIH'
+    ),
+}
+
+
+def sri_hash(path):
+    digest = hashlib.sha384(path.read_bytes()).digest()
+    return 'sha384-' + b64encode(digest).decode()
+
+
+def collect(directory):
+    """Собирает статику в directory и возвращает {имя: (размер, sha256)}."""
+    with override_settings(STATIC_ROOT=directory):
+        call_command('collectstatic', interactive=False, verbosity=0)
+    root = Path(directory)
+    build = {
+        path.relative_to(root).as_posix(): (
+            path.stat().st_size,
+            hashlib.sha256(path.read_bytes()).hexdigest(),
+        )
+        for path in sorted(root.rglob('*'))
+        if path.is_file() and path.name != 'staticfiles.json'
+    }
+    # Порядок ключей в манифесте зависит от обхода каталогов,
+    # поэтому сравнивается его содержимое, а не байты.
+    manifest = json.loads((root / 'staticfiles.json').read_text())
+    build['staticfiles.json'] = (None, sorted(manifest['paths'].items()))
+    return build
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет сторонние файлы статики по хэшам и что две сборки '
+        'collectstatic дают одинаковые файлы того же размера.'
+    )
+
+    def handle(self, *args, **options):
+        errors = []
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        for name, expected in VENDORED_ASSETS.items():
+            actual = sri_hash(static_dir / name)
+            if actual != expected:
+                errors.append(f'{name}: хэш {actual}, ожидался {expected}')
+        with tempfile.TemporaryDirectory() as first, \
+                tempfile.TemporaryDirectory() as second:
+            first_build = collect(first)
+            second_build = collect(second)
+        for name in sorted(first_build.keys() | second_build.keys()):
+            if first_build.get(name) != second_build.get(name):
+                errors.append(f'{name}: сборки различаются')
+        for name in VENDORED_ASSETS:
+            stem, _, extension = name.rpartition('.')
+            for built, (size, _) in first_build.items():
+                if built.startswith(stem + '.') and extension in built:
+                    self.stdout.write(f'{built}: {size} байт')
+        if errors:
+            raise CommandError('\n'.join(errors))
+        total = sum(size or 0 for size, _ in first_build.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Сборка воспроизводима: {len(first_build)} файлов, '
+            f'{total} байт.'
+        ))
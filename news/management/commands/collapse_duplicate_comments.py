@@ -0,0 +1,143 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from news.leaderboard import remove_comments
+from news.management.batching import MAX_IN_PARAMS, chunked
+from news.models import Comment, News, text_fingerprint
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет повторы комментариев по правилу проверки при отправке: '
+        'тот же текст (см. text_fingerprint) от того же автора или к той '
+        'же новости не позже чем через COMMENT_DUPLICATE_WINDOW секунд '
+        'после оставленного комментария. Из повторов остаётся самый ранний.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько комментариев обрабатывать в одной транзакции.',
+        )
+        parser.add_argument(
+            '--window', type=int, default=settings.COMMENT_DUPLICATE_WINDOW,
+            help='Окно повтора в секундах, по умолчанию как на сайте.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать повторы, ничего не меняя.',
+        )
+
+    def handle(self, *args, chunk_size, window, dry_run, **options):
+        if window is None:
+            raise CommandError(
+                'Проверка повторов выключена (COMMENT_DUPLICATE_WINDOW), '
+                'задайте окно через --window.'
+            )
+        if dry_run:
+            missing = Comment.objects.filter(fingerprint='').count()
+            if missing:
+                self.stdout.write(f'Не проверены, нет отпечатка: {missing}')
+        else:
+            filled = self.fill_fingerprints(chunk_size)
+            if filled:
+                self.stdout.write(f'Заполнено отпечатков: {filled}')
+        # Отпечатков с повторами немного, и их список читается целиком:
+        # удалять строки, пока открыт курсор по той же таблице, нельзя.
+        fingerprints = list(
+            Comment.objects.exclude(fingerprint='').order_by().values(
+                'fingerprint'
+            ).annotate(total=Count('pk')).filter(
+                total__gt=1
+            ).values_list('fingerprint', flat=True)
+        )
+        window = timedelta(seconds=window)
+        found = 0
+        batch = []
+        for fingerprint in fingerprints:
+            batch.extend(self.find_repeats(fingerprint, window))
+            if len(batch) >= chunk_size:
+                found += self.collapse(batch, dry_run)
+                batch = []
+        found += self.collapse(batch, dry_run)
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(
+                f'Найдено повторов: {found}, ничего не удалено.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Готово, удалено повторов: {found}.'
+            ))
+
+    def fill_fingerprints(self, chunk_size):
+        """Отпечатки строк, записанных в обход Comment.save()."""
+        filled = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    Comment.objects.filter(fingerprint='').only('text')[
+                        :chunk_size
+                    ]
+                )
+                if not chunk:
+                    return filled
+                for comment in chunk:
+                    comment.fingerprint = text_fingerprint(comment.text)
+                Comment.objects.bulk_update(chunk, ['fingerprint'])
+            filled += len(chunk)
+
+    def find_repeats(self, fingerprint, window):
+        """
+        Повторы с одним отпечатком — тройки (id, id новости, created).
+
+        Комментарии идут по времени по индексу (fingerprint, created).
+        Повтор сравнивается только с оставленными комментариями, как
+        и на сайте, где отклонённый повтор в базу не попадает.
+        """
+        comments = list(Comment.objects.filter(
+            fingerprint=fingerprint
+        ).order_by('created', 'pk').values_list(
+            'pk', 'news_id', 'author_id', 'created'
+        ))
+        kept_by_news = {}
+        kept_by_author = {}
+        repeats = []
+        for pk, news_id, author_id, created in comments:
+            since = created - window
+            if any(
+                kept is not None and kept >= since
+                for kept in (
+                    kept_by_news.get(news_id), kept_by_author.get(author_id)
+                )
+            ):
+                repeats.append((pk, news_id, created))
+            else:
+                kept_by_news[news_id] = created
+                kept_by_author[author_id] = created
+        return repeats
+
+    def collapse(self, repeats, dry_run):
+        """
+        Удаляет повторы одной транзакцией, вместе со счётчиками
+        новостей и таблицей самых обсуждаемых.
+        """
+        if dry_run or not repeats:
+            return len(repeats)
+        with transaction.atomic():
+            # Обычное удаление: сигналы сбросят кэш ленты. Повторы
+            # одного отпечатка могут перерасти порцию --chunk-size.
+            for ids in chunked((pk for pk, _, _ in repeats), MAX_IN_PARAMS):
+                Comment.objects.filter(pk__in=ids).delete()
+            counts = Counter(news_id for _, news_id, _ in repeats)
+            for news_id, deleted in counts.items():
+                News.objects.filter(pk=news_id).change_comment_count(-deleted)
+            remove_comments(
+                [(news_id, created) for _, news_id, created in repeats]
+            )
+        self.stdout.write(f'Удалено повторов: {len(repeats)}')
+        return len(repeats)
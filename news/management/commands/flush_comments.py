@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.ingest import get_comment_buffer
+
+
+class Command(BaseCommand):
+    help = 'Записывает комментарии, ожидающие в буфере COMMENT_INGEST.'
+
+    def handle(self, *args, **options):
+        comment_buffer = get_comment_buffer()
+        if comment_buffer is None:
+            raise CommandError('Буфер комментариев выключен.')
+        written = comment_buffer.flush()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано комментариев: {written}.'
+        ))
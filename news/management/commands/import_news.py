@@ -0,0 +1,115 @@
+import json
+import sys
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news.cache import invalidate_feed
+from news.management.batching import MAX_IN_PARAMS, chunked
+from news.models import News
+
+TITLE_MAX_LENGTH = News._meta.get_field('title').max_length
+
+
+def read_lines(path):
+    """Построчно читает файл или stdin, не загружая его целиком."""
+    if path == '-':
+        yield from sys.stdin
+        return
+    try:
+        with open(path, encoding='utf-8') as file:
+            yield from file
+    except OSError as error:
+        raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+
+def get_text(row, field):
+    """Поле строки файла, которое должно быть непустой строкой."""
+    value = row[field]
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f'{field}: нужна непустая строка')
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует новости из JSONL-файла: по объекту '
+        '{"title": ..., "text": ..., "date": "ГГГГ-ММ-ДД"} в строке. '
+        'Новости с уже существующей парой (title, date) пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу или «-» для stdin.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько новостей записывать в одной транзакции.',
+        )
+
+    def parse_lines(self, lines):
+        """Превращает строки файла в объекты News, пропуская битые."""
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                title = get_text(row, 'title')
+                if len(title) > TITLE_MAX_LENGTH:
+                    raise ValueError('слишком длинный заголовок')
+                yield News(
+                    title=title,
+                    text=get_text(row, 'text'),
+                    date=date.fromisoformat(row['date']),
+                )
+            except (KeyError, TypeError, ValueError) as error:
+                self.skipped += 1
+                self.stderr.write(f'Строка {number} пропущена: {error!r}')
+
+    def import_chunk(self, chunk):
+        """Записывает в базу новости порции, которых там ещё нет."""
+        dates = [news.date for news in chunk]
+        existing = set()
+        # Заголовки сверяются частями: порция может быть длиннее
+        # MAX_IN_PARAMS, а диапазон дат добавляет только два параметра.
+        for titles in chunked({news.title for news in chunk}, MAX_IN_PARAMS):
+            existing.update(News.objects.filter(
+                title__in=titles, date__range=(min(dates), max(dates)),
+            ).values_list('title', 'date'))
+        new_news = []
+        for news in chunk:
+            key = (news.title, news.date)
+            if key not in existing:
+                existing.add(key)
+                new_news.append(news)
+        News.objects.bulk_create(new_news)
+        return len(new_news)
+
+    @staticmethod
+    def rate(processed, started):
+        return processed / max(time.monotonic() - started, 1e-9)
+
+    def handle(self, *args, path, chunk_size, **options):
+        if chunk_size < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        self.skipped = 0
+        processed = created = 0
+        started = time.monotonic()
+        for chunk in chunked(self.parse_lines(read_lines(path)), chunk_size):
+            with transaction.atomic():
+                created += self.import_chunk(chunk)
+            processed += len(chunk)
+            self.stdout.write(
+                f'Обработано {processed}, добавлено {created}, '
+                f'{self.rate(processed, started):.0f} строк/с'
+            )
+        if created:
+            # bulk_create не отправляет сигналы, сбрасываем кэш сами.
+            invalidate_feed()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: добавлено {created}, дубликатов '
+            f'{processed - created}, битых строк {self.skipped} '
+            f'за {elapsed:.1f} с '
+            f'({self.rate(processed, started):.0f} строк/с).'
+        ))
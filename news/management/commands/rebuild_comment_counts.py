@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Сколько новостей обновлять в одной транзакции.',
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        last_pk = News.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        updated = 0
+        for start in range(0, last_pk + 1, chunk_size):
+            with transaction.atomic():
+                updated += News.objects.filter(
+                    pk__gte=start, pk__lt=start + chunk_size
+                ).rebuild_comment_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны счётчики у новостей: {updated}.'
+        ))
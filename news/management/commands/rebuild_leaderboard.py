@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from news.leaderboard import rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает таблицу самых обсуждаемых новостей за все периоды '
+        'из LEADERBOARD_PERIODS. Запускайте по расписанию.'
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_leaderboard()
+        self.stdout.write(self.style.SUCCESS(
+            f'Таблица пересчитана, строк: {rows}.'
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from news.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Строит полнотекстовый индекс по уже существующим новостям.'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Индекс FTS5 поддерживается только в SQLite.')
+        started = time.monotonic()
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс перестроен за {time.monotonic() - started:.1f} с.'
+        ))
@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment
+)
+
+from news.benchmarks.suite import DEFAULT_TOLERANCE, compare, run_suite
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет маршруты news на временной тестовой базе '
+        'и сравнивает результат с эталоном.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments-per-news', type=int, default=100)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument(
+            '--output', help='Куда записать результат в JSON.'
+        )
+        parser.add_argument(
+            '--baseline', help='JSON с эталонным результатом для сравнения.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+            help='Допустимый относительный рост времени и памяти.',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            result = run_suite(
+                options['news'],
+                options['comments_per_news'],
+                options['users'],
+                options['iterations'],
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        report = json.dumps(result, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
+        if baseline is None:
+            return
+        regressions = compare(result, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно эталона:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:16
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+WORD_RE = re.compile(r'\w+')
+
+
+def text_fingerprint(text):
+    """
+    Копия news.models.text_fingerprint на момент миграции: миграция
+    не должна меняться вместе с кодом приложения.
+    """
+    words = WORD_RE.findall(unicodedata.normalize('NFKC', text).casefold())
+    return hashlib.blake2b(
+        ' '.join(words).encode(), digest_size=16
+    ).hexdigest()
+
+
+def fill_fingerprints(apps, schema_editor):
+    """Пачками по id: читать таблицу курсором и писать в неё нельзя."""
+    Comment = apps.get_model('news', 'Comment')
+    comments = Comment.objects.only('text').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(comments.filter(pk__gt=last_pk)[:1000])
+        if not batch:
+            return
+        for comment in batch:
+            comment.fingerprint = text_fingerprint(comment.text)
+        Comment.objects.bulk_update(batch, ['fingerprint'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_archived_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['fingerprint', 'created'], name='comment_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations
+
+WORD_RE = re.compile(r'\w+')
+
+# Такой отпечаток 0010 давала любому тексту без букв и цифр.
+EMPTY_FINGERPRINT = hashlib.blake2b(b'', digest_size=16).hexdigest()
+
+
+def text_fingerprint(text):
+    """Копия news.models.text_fingerprint на момент миграции."""
+    normalized = unicodedata.normalize('NFKC', text).casefold()
+    words = WORD_RE.findall(normalized) or normalized.split()
+    return hashlib.blake2b(
+        ' '.join(words).encode(), digest_size=16
+    ).hexdigest()
+
+
+def refill_fingerprints(apps, schema_editor):
+    """Пересчитывает отпечатки текстов без слов, пачками по id."""
+    Comment = apps.get_model('news', 'Comment')
+    comments = Comment.objects.filter(
+        fingerprint=EMPTY_FINGERPRINT
+    ).only('text').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(comments.filter(pk__gt=last_pk)[:1000])
+        if not batch:
+            return
+        for comment in batch:
+            comment.fingerprint = text_fingerprint(comment.text)
+        Comment.objects.bulk_update(batch, ['fingerprint'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_leaderboard'),
+    ]
+
+    operations = [
+        migrations.RunPython(refill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -1,22 +1,134 @@
+import hashlib
+import re
+import unicodedata
 from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+WORD_RE = re.compile(r'\w+')
+
+
+def text_fingerprint(text):
+    """
+    Отпечаток текста комментария для поиска повторов.
+
+    Регистр, пробелы, знаки препинания и начертание символов (NFKC)
+    не учитываются: «Купи!!  Сейчас» и «купи сейчас» совпадут.
+    В тексте без букв и цифр («👍», «???») сравнивается сам текст
+    без лишних пробелов, иначе все такие комментарии совпали бы.
+    """
+    normalized = unicodedata.normalize('NFKC', text).casefold()
+    words = WORD_RE.findall(normalized) or normalized.split()
+    return hashlib.blake2b(
+        ' '.join(words).encode(), digest_size=16
+    ).hexdigest()
+
+
+def count_comments():
+    """
+    Подзапрос с числом комментариев к новости из внешнего запроса.
+
+    Учитываются и перенесённые в архив комментарии.
+    """
+    def count_in(model):
+        comments = model.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(total=Count('pk'))
+        return Coalesce(Subquery(comments.values('total')), 0)
+
+    return count_in(Comment) + count_in(ArchivedComment)
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def with_actual_comment_count(self):
+        """
+        Добавляет к новостям поле actual_comment_count.
+
+        Количество считается коррелированным подзапросом в том же SQL,
+        поэтому сами комментарии из базы не загружаются.
+        """
+        return self.annotate(actual_comment_count=count_comments())
+
+    def with_comment_count_drift(self):
+        """Новости, у которых счётчик разошёлся с числом комментариев."""
+        return self.with_actual_comment_count().exclude(
+            comment_count=F('actual_comment_count')
+        )
+
+    def change_comment_count(self, delta):
+        """
+        Атомарно меняет счётчик комментариев на delta.
+
+        Счётчик не уходит в минус, даже если уже разошёлся с данными.
+        """
+        return self.update(
+            comment_count=Greatest(F('comment_count') + delta, 0),
+            modified=timezone.now(),
+        )
+
+    def touch(self):
+        """Отмечает, что комментарии к новостям изменились."""
+        return self.update(modified=timezone.now())
+
+    def rebuild_comment_counts(self):
+        """Пересчитывает счётчики одним UPDATE с подзапросом."""
+        return self.update(comment_count=count_comments())
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Меняется и при правке самой новости, и при любых изменениях
+    # её комментариев: по нему строятся ETag и Last-Modified в API.
+    # Не auto_now: иначе loaddata не загрузит фикстуры без этого поля.
+    modified = models.DateTimeField(default=timezone.now, editable=False)
+    # Часть комментариев перенесена в ArchivedComment.
+    comments_archived = models.BooleanField(default=False, editable=False)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-id')
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+            models.Index(fields=('title', 'date'), name='news_title_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.modified = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'modified'}
+        super().save(*args, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def recent_duplicates(self, news_id, author_id, text, since):
+        """
+        Комментарии с тем же отпечатком текста, что и text, от того же
+        автора или к той же новости, написанные не раньше since.
+
+        Выборка идёт по индексу (fingerprint, created).
+        """
+        return self.filter(
+            Q(author_id=author_id) | Q(news_id=news_id),
+            fingerprint=text_fingerprint(text),
+            created__gte=since,
+        )
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -28,10 +140,126 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    # Не auto_now_add: комментарий из буфера (news/ingest.py) сохраняет
+    # время, когда его приняли, а не время записи пачки.
+    created = models.DateTimeField(default=timezone.now, editable=False)
+    # Версия текста: входит в ключ кэша отрендеренного комментария.
+    modified = models.DateTimeField(default=timezone.now, editable=False)
+    # text_fingerprint(text); bulk_create его не считает, это делает
+    # вызывающий код.
+    fingerprint = models.CharField(max_length=32, editable=False, default='')
+
+    objects = CommentQuerySet.as_manager()
+
+    is_archived = False
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('fingerprint', 'created'),
+                name='comment_fingerprint_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def save(self, *args, **kwargs):
+        self.modified = timezone.now()
+        self.fingerprint = text_fingerprint(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, 'modified', 'fingerprint'
+            }
+        super().save(*args, **kwargs)
+
+
+class ArchivedComment(models.Model):
+    """
+    Комментарий к старой новости, перенесённый из Comment
+    командой archive_comments.
+
+    id сохраняется, поэтому курсоры страниц и ключи кэша остаются
+    прежними. Архив только для чтения.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    news = models.ForeignKey(
+        News,
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    text = models.TextField()
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = (
+            # id здесь не псевдоним rowid, поэтому он нужен в индексе
+            # для сортировки по (created, id) без временного B-дерева.
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='archived_news_created_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.text[:50]
+
+
+class PendingComment(models.Model):
+    """
+    Принятый, но ещё не записанный комментарий.
+
+    Очередь для режима COMMENT_INGEST['MODE'] = 'table' (news/ingest.py):
+    вставка сюда не трогает счётчик новости, а в Comment строки
+    переносятся пачками.
+    """
+    news = models.ForeignKey(News, on_delete=models.CASCADE)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    text = models.TextField()
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('id',)
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Число комментариев к новости за скользящий период
+    из LEADERBOARD_PERIODS — материализованный «самые обсуждаемые».
+
+    Новые и удалённые комментарии меняют его сразу (news/leaderboard.py),
+    а комментарии, вышедшие за границу периода, убирает команда
+    rebuild_leaderboard.
+    """
+    period = models.CharField(max_length=16)
+    news = models.ForeignKey(News, on_delete=models.CASCADE)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('period', 'news'), name='leaderboard_period_news_uniq'
+            ),
+        )
+        indexes = (
+            # Лидеры периода читаются одним проходом по индексу.
+            models.Index(
+                fields=('period', '-comment_count', '-news_id'),
+                name='leaderboard_top_idx',
+            ),
+        )
@@ -0,0 +1,77 @@
+"""Поиск запрещённых слов в тексте комментария за один проход."""
+import re
+
+TERMINAL = ''
+
+
+def build_trie(words):
+    """Собирает префиксное дерево: узел — словарь «символ -> узел»."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[TERMINAL] = {}
+    return trie
+
+
+def trie_to_pattern(node):
+    """
+    Превращает префиксное дерево в регулярное выражение.
+
+    Общие префиксы выносятся за скобки, поэтому в каждой позиции текста
+    проверяется не весь словарь, а только одна ветка дерева.
+    """
+    is_terminal = TERMINAL in node
+    chars = sorted(char for char in node if char != TERMINAL)
+    branches = [
+        re.escape(char) + trie_to_pattern(node[char]) for char in chars
+    ]
+    if not branches:
+        return ''
+    if len(branches) == 1:
+        pattern = branches[0]
+        if is_terminal:
+            return f'(?:{pattern})?'
+        return pattern
+    if all(node[char] == {TERMINAL: {}} for char in chars):
+        pattern = '[' + ''.join(re.escape(char) for char in chars) + ']'
+    else:
+        pattern = '(?:' + '|'.join(branches) + ')'
+    if is_terminal:
+        return f'{pattern}?'
+    return pattern
+
+
+class BadWordsFilter:
+    """
+    Словарь стоп-слов, скомпилированный в одно регулярное выражение.
+
+    Выражение строится один раз — при создании фильтра или вызове reload().
+    """
+
+    def __init__(self, words=()):
+        self.reload(words)
+
+    def reload(self, words):
+        """Перестраивает выражение под новый словарь."""
+        self.words = tuple(sorted({word.lower() for word in words if word}))
+        if self.words:
+            self.pattern = re.compile(trie_to_pattern(build_trie(self.words)))
+        else:
+            self.pattern = None
+
+    def find_all(self, text):
+        """
+        Возвращает все вхождения стоп-слов в порядке их появления.
+
+        При пересечении вхождений побеждает самое длинное слово.
+        """
+        if self.pattern is None:
+            return []
+        return self.pattern.findall(text.lower())
+
+    def __contains__(self, text):
+        return self.pattern is not None and bool(
+            self.pattern.search(text.lower())
+        )
@@ -0,0 +1,99 @@
+"""Курсорная (keyset) пагинация комментариев к новости."""
+import base64
+import binascii
+import heapq
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import ArchivedComment, Comment
+
+CURSOR_SEPARATOR = '|'
+# Наибольшее значение целого в SQLite и bigint в PostgreSQL.
+MAX_CURSOR_PK = 2 ** 63 - 1
+
+
+def encode_cursor(comment):
+    """Курсор указывает на последний показанный комментарий."""
+    raw = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Разбирает курсор в пару (created, pk).
+
+    Для повреждённого курсора выбрасывается ValueError, в том числе
+    для времени без часового пояса и id, который не влезет в запрос.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created, pk = raw.split(CURSOR_SEPARATOR)
+        created, pk = datetime.fromisoformat(created), int(pk)
+        if created.tzinfo is None:
+            raise ValueError('время курсора без часового пояса')
+        if not 1 <= pk <= MAX_CURSOR_PK:
+            raise ValueError('id курсора вне допустимого диапазона')
+        return created, pk
+    except (binascii.Error, UnicodeError, ValueError) as error:
+        raise ValueError(f'Некорректный курсор: {cursor!r}') from error
+
+
+def comment_order(comment):
+    return comment.created, comment.pk
+
+
+def get_comment_page(news, size, cursor=None, with_authors=True):
+    """
+    Возвращает не больше size комментариев после курсора
+    и курсор следующей страницы (None, если страница последняя).
+
+    Комментарии упорядочены по (created, id), поэтому выборка
+    идёт по индексу и не зависит от того, сколько их всего.
+    Без with_authors авторы не подгружаются: так делает страница
+    новости, которой они нужны только для промахов кэша.
+    У новости с архивом страница собирается из двух таблиц: из каждой
+    берётся по size + 1 комментариев, и они сливаются в общий порядок.
+    """
+    models = (
+        (ArchivedComment, Comment) if news.comments_archived else (Comment,)
+    )
+    if cursor is not None:
+        created, pk = decode_cursor(cursor)
+    comments = []
+    for model in models:
+        queryset = model.objects.filter(news=news).order_by('created', 'pk')
+        if with_authors:
+            queryset = queryset.select_related('author')
+        if cursor is not None:
+            queryset = queryset.filter(
+                Q(created__gt=created) | Q(created=created, pk__gt=pk)
+            )
+        comments.extend(queryset[:size + 1])
+    if len(models) > 1:
+        comments.sort(key=comment_order)
+    if len(comments) > size:
+        return comments[:size], encode_cursor(comments[size - 1])
+    return comments, None
+
+
+def iter_comments(news, chunk_size):
+    """
+    Все комментарии к новости в порядке (created, id).
+
+    Строки читаются курсором базы по chunk_size, а не загружаются
+    в память целиком. У новости с архивом курсоры двух таблиц
+    сливаются: каждый уже упорядочен по индексу.
+    """
+    models = (
+        (ArchivedComment, Comment) if news.comments_archived else (Comment,)
+    )
+    iterators = [
+        model.objects.filter(news=news).order_by(
+            'created', 'pk'
+        ).iterator(chunk_size=chunk_size)
+        for model in models
+    ]
+    if len(iterators) == 1:
+        return iterators[0]
+    return heapq.merge(*iterators, key=comment_order)
@@ -1,10 +1,42 @@
+import sqlite3
 from datetime import datetime, timedelta
 import pytest
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client
 from django.urls import reverse
 from django.utils import timezone
 
 from news.models import Comment, News
+from yanews.test_runner import get_test_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def project_test_settings():
+    """
+    Как и в manage.py test: статика без манифеста, превышение
+    бюджета SQL-запросов — ошибка.
+    """
+    with get_test_settings():
+        yield
+
+
+@pytest.fixture
+def old_sqlite_limit():
+    """Не больше 999 параметров в запросе, как в SQLite до 3.32."""
+    connection.ensure_connection()
+    limit = sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER
+    previous = connection.connection.setlimit(limit, 999)
+    yield
+    connection.connection.setlimit(limit, previous)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш не переживает транзакцию теста, поэтому чистим его сами."""
+    cache.clear()
+    yield
+    cache.clear()
 
 
 @pytest.fixture
@@ -52,6 +84,11 @@ def news_detail_url(news):
     return reverse('news:detail', args=(news.pk,))
 
 
+@pytest.fixture
+def news_thread_url(news):
+    return reverse('news:thread', args=(news.pk,))
+
+
 @pytest.fixture
 def all_news():
     today = datetime.today()
@@ -0,0 +1,72 @@
+"""
+Сценарий для test_replica.py: основная база и реплика — два файла SQLite.
+
+Запускается в отдельном процессе, потому что базы настраиваются до
+django.setup(). Реплика обновляется копированием основной базы, а
+между копиями отстаёт от неё, как настоящая реплика:
+
+    python -m news.pytest_tests.replica_scenario КАТАЛОГ
+"""
+import json
+import os
+import sqlite3
+import sys
+
+
+def replicate(primary, replica):
+    from django.db import connections
+
+    connections.close_all()
+    with sqlite3.connect(primary) as source, \
+            sqlite3.connect(replica) as target:
+        source.backup(target)
+
+
+def run(directory):
+    primary = os.path.join(directory, 'primary.sqlite3')
+    replica = os.path.join(directory, 'replica.sqlite3')
+    os.environ['DATABASE_REPLICA_NAME'] = replica
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = primary
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from news.models import News
+
+    setup_test_environment()
+    call_command('migrate', verbosity=0)
+    news = News.objects.create(title='Новость', text='Текст')
+    author = get_user_model().objects.create(username='Автор')
+    replicate(primary, replica)
+    url = reverse('news:detail', args=(news.pk,))
+    reader = Client()
+    writer = Client()
+    writer.force_login(author)
+    text = 'Комментарий, которого ещё нет на реплике'
+
+    result = {'reader_status': reader.get(url).status_code}
+    response = writer.post(url, {'text': text})
+    result['pinned'] = settings.REPLICA_PIN_COOKIE in response.cookies
+    result['writer_sees_own_comment'] = text in (
+        writer.get(url).content.decode()
+    )
+    result['reader_sees_comment_before_replication'] = text in (
+        reader.get(url).content.decode()
+    )
+    replicate(primary, replica)
+    result['reader_sees_comment_after_replication'] = text in (
+        reader.get(url).content.decode()
+    )
+    return result
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(sys.argv[1])))
@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+FORM_DATA = {
+    'text': 'Новый текст',
+}
+
+
+@pytest.fixture
+def api_feed_url():
+    return reverse('news:api_feed')
+
+
+@pytest.fixture
+def api_comments_url(news):
+    return reverse('news:api_comments', args=(news.pk,))
+
+
+def test_feed_lists_latest_news(client, api_feed_url, all_news):
+    """Лента в API совпадает с главной страницей."""
+    response = client.get(api_feed_url)
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()['results']
+    assert len(results) == settings.NEWS_COUNT_ON_HOME_PAGE
+    dates = [news['date'] for news in results]
+    assert dates == sorted(dates, reverse=True)
+    assert response['ETag']
+
+
+def test_feed_ignores_if_modified_since(client, api_feed_url, all_news):
+    """
+    Удаление самой свежей новости не двигает время ленты вперёд,
+    поэтому лента отвечает 304 только по ETag.
+    """
+    response = client.get(api_feed_url)
+    assert not response.has_header('Last-Modified')
+    News.objects.order_by('-date').first().delete()
+    response = client.get(
+        api_feed_url,
+        HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_feed_not_modified_costs_one_query(
+        client, api_feed_url, all_news, django_assert_num_queries
+):
+    """Повторный запрос с If-None-Match — один запрос к базе и ответ 304."""
+    etag = client.get(api_feed_url)['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(api_feed_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.content
+
+
+def test_comment_changes_feed_and_comments_etag(
+        client, author_client, news, news_detail_url,
+        api_feed_url, api_comments_url
+):
+    """Новый комментарий меняет ETag и ленты, и комментариев новости."""
+    feed_etag = client.get(api_feed_url)['ETag']
+    comments_etag = client.get(api_comments_url)['ETag']
+    author_client.post(news_detail_url, data=FORM_DATA)
+
+    response = client.get(api_feed_url, HTTP_IF_NONE_MATCH=feed_etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'][0]['comment_count'] == 1
+
+    response = client.get(api_comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'][0]['text'] == FORM_DATA['text']
+
+
+def test_comments_are_paginated(client, api_comments_url, comments):
+    """Комментарии отдаются страницами по курсору."""
+    url = api_comments_url
+    total = 0
+    while url:
+        page = client.get(url).json()
+        assert len(page['results']) <= settings.COMMENTS_COUNT_ON_PAGE
+        total += len(page['results'])
+        url = page['next']
+    assert total == 222
+
+
+def test_comments_of_missing_news(client):
+    url = reverse('news:api_comments', args=(0,))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import reverse
+
+from news.models import ArchivedComment, Comment, LeaderboardEntry, News
+
+pytestmark = pytest.mark.django_db
+
+OLD_DATE = date.today() - timedelta(
+    days=settings.COMMENT_ARCHIVE_AFTER_DAYS + 1
+)
+
+
+def collect_comment_ids(client, url):
+    """Проходит по всем страницам комментариев и собирает их id."""
+    ids = []
+    while url:
+        response = client.get(url)
+        ids.extend(comment.pk for comment in response.context['comments'])
+        url = response.context.get('next_comments_url')
+    return ids
+
+
+@pytest.fixture
+def old_news(news):
+    News.objects.filter(pk=news.pk).update(date=OLD_DATE)
+    return news
+
+
+def test_archived_comments_are_read_transparently(
+        client, old_news, comments, news_detail_url
+):
+    """После переноса страница новости выводит те же комментарии."""
+    before = collect_comment_ids(client, news_detail_url)
+    call_command('archive_comments', chunk_size=100)
+    assert Comment.objects.count() == 0
+    assert ArchivedComment.objects.count() == len(before)
+    assert collect_comment_ids(client, news_detail_url) == before
+
+
+def test_new_comments_follow_archived_ones(
+        author_client, old_news, comment, news_detail_url
+):
+    """Новые комментарии к старой новости идут после архивных."""
+    News.objects.rebuild_comment_counts()
+    call_command('archive_comments')
+    author_client.post(news_detail_url, data={'text': 'Новый комментарий'})
+    ids = collect_comment_ids(author_client, news_detail_url)
+    assert ids == [comment.pk, Comment.objects.get().pk]
+    # Счётчик учитывает обе таблицы.
+    assert not News.objects.with_comment_count_drift().exists()
+
+
+def test_thread_merges_archive_and_live_comments(
+        client, author, old_news, comments, news_thread_url
+):
+    """Потоковая страница сливает обе таблицы в общий порядок."""
+    call_command('archive_comments')
+    middle = ArchivedComment.objects.order_by('created')[100]
+    Comment.objects.create(
+        news=old_news, author=author, text='Живой комментарий',
+        created=middle.created + timedelta(seconds=1),
+    )
+    response = client.get(news_thread_url)
+    content = b''.join(response.streaming_content).decode()
+    texts = [
+        comment.text for comment in sorted(
+            [*ArchivedComment.objects.all(), *Comment.objects.all()],
+            key=lambda comment: (comment.created, comment.pk),
+        )
+    ]
+    positions = [content.index(f'>{text}</p>') for text in texts]
+    assert positions == sorted(positions)
+
+
+def test_archived_comments_are_read_only(
+        author_client, old_news, comment, news_detail_url, comment_edit_url
+):
+    call_command('archive_comments')
+    response = author_client.get(news_detail_url)
+    assert comment_edit_url not in response.content.decode()
+    assert author_client.get(comment_edit_url).status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+def test_recent_news_is_not_archived(news, comment):
+    call_command('archive_comments')
+    assert Comment.objects.filter(pk=comment.pk).exists()
+    news.refresh_from_db()
+    assert not news.comments_archived
+
+
+def test_archived_news_is_deleted_with_archive(old_news, comment):
+    call_command('archive_comments')
+    News.objects.all().delete()
+    assert ArchivedComment.objects.count() == 0
+
+
+def test_archived_comments_are_deleted_in_admin(
+        admin_client, old_news, comments
+):
+    """Удаление из архива в админке учтено в счётчике и лидерах."""
+    News.objects.rebuild_comment_counts()
+    call_command('archive_comments')
+    call_command('rebuild_leaderboard')
+    total = ArchivedComment.objects.count()
+    first, second, third = ArchivedComment.objects.order_by('-created')[:3]
+    response = admin_client.get(
+        reverse('admin:news_archivedcomment_change', args=(first.pk,))
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert not response.context['has_change_permission']
+
+    admin_client.post(
+        reverse('admin:news_archivedcomment_delete', args=(first.pk,)),
+        {'post': 'yes'},
+    )
+    admin_client.post(reverse('admin:news_archivedcomment_changelist'), {
+        'action': 'delete_selected',
+        '_selected_action': [second.pk, third.pk],
+        'post': 'yes',
+    })
+    assert ArchivedComment.objects.count() == total - 3
+    assert not News.objects.with_comment_count_drift().exists()
+    leaders = LeaderboardEntry.objects.filter(
+        comment_count__gt=0
+    ).values_list('period', 'news_id', 'comment_count')
+    before = set(leaders)
+    call_command('rebuild_leaderboard')
+    assert set(leaders) == before
+
+
+def test_archive_chunk_fits_old_sqlite(old_news, author, old_sqlite_limit):
+    """Порция по умолчанию удаляется в пределах 999 параметров."""
+    Comment.objects.bulk_create(
+        Comment(news=old_news, author=author, text=f'Текст {index}')
+        for index in range(1000)
+    )
+    call_command('archive_comments')
+    assert not Comment.objects.exists()
+    assert ArchivedComment.objects.count() == 1000
@@ -0,0 +1,110 @@
+import html
+import logging
+import re
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIHandler
+from django.test import RequestFactory
+
+from news import async_views
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def anonymous_request():
+    def make_request(path, method='get', **kwargs):
+        request = getattr(RequestFactory(), method)(path, **kwargs)
+        request.user = AnonymousUser()
+        return request
+    return make_request
+
+
+def test_async_home_serves_cache_without_database(
+        client, home_url, news, anonymous_request, django_assert_num_queries
+):
+    """
+    Асинхронная главная отдаёт ту же страницу, что и синхронная,
+    а закэшированную — без обращения к базе.
+    """
+    sync_content = client.get(home_url).content
+    with django_assert_num_queries(0):
+        response = async_to_sync(async_views.news_list)(
+            anonymous_request(home_url)
+        )
+    assert response.content == sync_content
+
+
+def test_async_detail_renders_news(news, news_detail_url, anonymous_request):
+    """Асинхронная страница новости рендерится в пуле потоков."""
+    response = async_to_sync(async_views.news_detail)(
+        anonymous_request(news_detail_url), pk=news.pk
+    )
+    assert news.title in response.content.decode()
+
+
+def test_async_detail_rejects_other_methods(
+        news_detail_url, anonymous_request
+):
+    response = async_to_sync(async_views.news_detail)(
+        anonymous_request(news_detail_url, method='put'), pk=1
+    )
+    assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+
+
+def test_thread_under_asgi_is_limited_to_first_chunk(
+        async_client, client, news, news_thread_url, comments, settings
+):
+    """
+    Под ASGI поток читался бы в цикле событий без доступа к ORM,
+    поэтому там отдаётся обычный ответ с первой пачкой комментариев
+    и ссылкой на следующую страницу новости.
+    """
+    settings.COMMENTS_STREAM_CHUNK_SIZE = 50
+
+    async def get_thread():
+        return await async_client.get(news_thread_url)
+
+    response = async_to_sync(get_thread)()
+    assert response.status_code == HTTPStatus.OK
+    assert not response.streaming
+    content = response.content.decode()
+    assert content.count('Текст заметки') == 50
+    assert content.rstrip().endswith('</html>')
+
+    ordered = [
+        comment.pk for comment in Comment.objects.order_by('created', 'pk')
+    ]
+    next_url = re.search(r'href="([^"]+after=[^"]+)"', content)[1]
+    response = client.get(html.unescape(next_url))
+    assert [comment.pk for comment in response.context['comments']] == (
+        ordered[50:50 + settings.COMMENTS_COUNT_ON_PAGE]
+    )
+
+
+def test_project_middleware_keeps_chain_async(settings, caplog):
+    """
+    Middleware проекта работают в асинхронной цепочке: Django не
+    оборачивает их переходом в пул потоков (об этом он пишет в лог).
+    """
+    settings.DEBUG = True
+    with caplog.at_level(logging.DEBUG, logger='django.request'):
+        ASGIHandler()
+    adapted = [
+        record.getMessage() for record in caplog.records
+        if 'adapted' in record.getMessage()
+    ]
+    assert not [message for message in adapted if 'yanews' in message]
+
+
+def test_timing_counts_queries_under_asgi(async_client, home_url, news):
+    """Запросы из пула потоков попадают в замеры асинхронного запроса."""
+    async def get_home():
+        return await async_client.get(home_url)
+
+    timing = async_to_sync(get_home)()['Server-Timing']
+    assert 'desc="2 queries"' in timing
@@ -0,0 +1,69 @@
+import pytest
+
+from news.auth import get_user_cache, get_user_cache_key
+from news.checks import check_shared_auth_caches
+from news.benchmarks.auth import run_comparison
+
+pytestmark = pytest.mark.django_db
+
+
+def test_logged_in_reader_is_resolved_from_cache(
+        author_client, news_detail_url, django_assert_num_queries
+):
+    """Страница новости: только запросы новости и комментариев."""
+    author_client.get(news_detail_url)
+    with django_assert_num_queries(2):
+        response = author_client.get(news_detail_url)
+    assert response.wsgi_request.user.is_authenticated
+
+
+def test_user_is_loaded_once_after_cache_miss(
+        author, author_client, home_url, django_assert_num_queries
+):
+    """Без кэша пользователь читается из базы и снова кэшируется."""
+    get_user_cache().delete(get_user_cache_key(author.pk))
+    author_client.get(home_url)
+    with django_assert_num_queries(0):
+        response = author_client.get(home_url)
+    assert response.wsgi_request.user == author
+
+
+def test_password_change_ends_other_sessions(
+        author, author_client, news_detail_url,
+        django_capture_on_commit_callbacks
+):
+    """Смена пароля сбрасывает кэш, и старая сессия перестаёт работать."""
+    author_client.get(news_detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author.set_password('новый-пароль')
+        author.save()
+    response = author_client.get(news_detail_url)
+    assert not response.wsgi_request.user.is_authenticated
+
+
+def test_logout_forgets_user(author, author_client, logout_url):
+    author_client.get(logout_url)
+    assert get_user_cache().get(get_user_cache_key(author.pk)) is None
+
+
+def test_auth_cache_benchmark_reduces_queries():
+    result = run_comparison(news_count=3, comments_per_news=2, iterations=2)
+    for route in ('home', 'detail'):
+        assert (
+            result['after'][route]['queries']
+            == result['before'][route]['queries'] - 2
+        )
+
+
+def test_deploy_check_requires_shared_cache(settings):
+    """С LocMemCache другие процессы не узнают о смене пароля."""
+    assert {error.id for error in check_shared_auth_caches(None)} == {
+        'news.E001'
+    }
+    settings.CACHES = {
+        **settings.CACHES,
+        'shared': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    }
+    settings.AUTH_USER_CACHE_ALIAS = 'shared'
+    settings.SESSION_CACHE_ALIAS = 'shared'
+    assert check_shared_auth_caches(None) == []
@@ -0,0 +1,34 @@
+import pytest
+
+from news.benchmarks.suite import METRICS, compare, run_suite
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def result():
+    return run_suite(
+        news_count=15, comments_per_news=3, users_count=4, iterations=2
+    )
+
+
+def test_suite_measures_every_route(result):
+    """Сидер наполняет базу, а замеры есть для каждого маршрута."""
+    assert News.objects.count() == 15
+    assert News.objects.with_comment_count_drift().count() == 0
+    assert Comment.objects.filter(text__endswith='для замеров.').count() == 45
+    for metrics in result['routes'].values():
+        assert set(metrics) == set(METRICS)
+    assert result['routes']['home_cached']['queries'] == 0
+
+
+def test_compare_reports_regressions(result):
+    """Рост числа запросов — регрессия, совпадение с эталоном — нет."""
+    assert compare(result, result) == []
+    baseline = {'routes': {'home': dict(result['routes']['home'])}}
+    baseline['routes']['home']['queries'] -= 1
+    assert compare(result, baseline) == [
+        f'home.queries: {result["routes"]["home"]["queries"]} '
+        f'(эталон {baseline["routes"]["home"]["queries"]})'
+    ]
@@ -1,13 +1,24 @@
+import base64
+import re
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
+from django.urls import reverse
 
 from news.forms import CommentForm
+from news.models import Comment, News
 
 pytestmark = pytest.mark.django_db
 
 FORM_DATA = {
     'text': 'Новый текст',
 }
+COMMENT_TEXT = re.compile(r'<p class="mb-0">(.*?)</p>')
+
+
+def encode_raw_cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
 
 def test_news_count(client, home_url, all_news):
@@ -64,3 +75,200 @@ def test_authorised_client_can_access_comment_form(
     assert 'form' in response.context
     form = response.context['form']
     assert isinstance(form, CommentForm)
+
+
+def test_home_comment_count_in_single_query(
+        client, home_url, news, comments, django_assert_num_queries
+):
+    """
+    Количество комментариев на главной берётся из счётчика новости:
+    лента строится одним запросом, комментарии не загружаются.
+    Второй запрос — блок самых обсуждаемых.
+    """
+    News.objects.rebuild_comment_counts()
+    with django_assert_num_queries(2):
+        response = client.get(home_url)
+    news_on_page = response.context['object_list'][0]
+    assert news_on_page.comment_count == news.comment_set.count()
+    assert f'Комментариев: {news_on_page.comment_count}' in (
+        response.content.decode()
+    )
+
+
+def test_detail_comments_are_paginated(client, news_detail_url, comments):
+    """
+    На странице новости комментарии выводятся порциями;
+    пройдя по ссылкам «Показать ещё», можно получить все комментарии
+    в хронологическом порядке и без повторов.
+    """
+    page_size = settings.COMMENTS_COUNT_ON_PAGE
+    all_comments = []
+    url = news_detail_url
+    while url:
+        response = client.get(url)
+        page = response.context['comments']
+        assert len(page) <= page_size
+        all_comments.extend(page)
+        url = response.context.get('next_comments_url')
+    expected = list(Comment.objects.order_by('created', 'pk'))
+    assert all_comments == expected
+
+
+@pytest.mark.parametrize('cursor', (
+    'не-курсор',
+    encode_raw_cursor('2020-01-01T00:00:00+00:00|100000000000000000000'),
+    encode_raw_cursor('2020-01-01T00:00:00+00:00|0'),
+    encode_raw_cursor('2020-01-01T00:00:00|1'),
+))
+def test_detail_rejects_broken_cursor(client, news_detail_url, cursor):
+    """Повреждённый курсор пагинации — это ошибка клиента."""
+    response = client.get(news_detail_url, {'after': cursor})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_home_page_is_served_from_cache(
+        client, home_url, news, django_assert_num_queries
+):
+    """Повторный запрос главной анонимом не обращается к базе."""
+    first_response = client.get(home_url)
+    with django_assert_num_queries(0):
+        second_response = client.get(home_url)
+    assert second_response.content == first_response.content
+
+
+def test_home_cache_is_invalidated_by_comments(
+        client, home_url, news, author_client, news_detail_url,
+        django_capture_on_commit_callbacks
+):
+    """Новый комментарий к новости из ленты сбрасывает кэш главной."""
+    client.get(home_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(news_detail_url, data=FORM_DATA)
+    response = client.get(home_url)
+    assert response.context['object_list'][0].comment_count == 1
+
+
+def test_home_cache_ignores_news_outside_feed(
+        client, home_url, all_news, author
+):
+    """Комментарий к новости за пределами ленты кэш не сбрасывает."""
+    client.get(home_url)
+    old_news = News.objects.last()
+    Comment.objects.create(news=old_news, author=author, text='Текст')
+    response = client.get(home_url)
+    assert response.context is None
+
+
+def test_home_cache_varies_by_user(client, author_client, author, home_url):
+    """Авторизованный пользователь не получает страницу анонима."""
+    client.get(home_url)
+    response = author_client.get(home_url)
+    assert author.username in response.content.decode()
+
+
+def test_detail_comment_fragments_are_cached(
+        client, news_detail_url, comment, django_assert_num_queries
+):
+    """
+    Повторный показ страницы берёт комментарии из кэша:
+    остаются запросы новости и комментариев, авторы не загружаются.
+    """
+    first_response = client.get(news_detail_url)
+    with django_assert_num_queries(2):
+        second_response = client.get(news_detail_url)
+    assert second_response.content == first_response.content
+    assert comment.author.username in second_response.content.decode()
+
+
+def test_edited_comment_is_rendered_again(
+        author_client, news_detail_url, comment, comment_edit_url
+):
+    """Правка комментария меняет его версию и ключ в кэше."""
+    author_client.get(news_detail_url)
+    author_client.post(comment_edit_url, data=FORM_DATA)
+    response = author_client.get(news_detail_url)
+    content = response.content.decode()
+    assert f'<p class="mb-0">{FORM_DATA["text"]}</p>' in content
+    assert f'<p class="mb-0">{comment.text}</p>' not in content
+
+
+def test_comment_controls_are_shown_to_author_only(
+        client, django_user_model, author_client, news_detail_url,
+        comment, comment_edit_url
+):
+    """Ссылки на правку видит только автор, хотя тело общее в кэше."""
+    reader = django_user_model.objects.create(username='Читатель')
+    client.force_login(reader)
+    assert comment_edit_url not in client.get(news_detail_url).content.decode()
+    assert comment_edit_url in (
+        author_client.get(news_detail_url).content.decode()
+    )
+
+
+def test_thread_streams_header_before_comments(
+        client, news, news_thread_url, comments, settings
+):
+    """
+    Шапка уходит отдельной первой частью, комментарии — пачками
+    по COMMENTS_STREAM_CHUNK_SIZE в хронологическом порядке.
+    """
+    settings.COMMENTS_STREAM_CHUNK_SIZE = 50
+    response = client.get(news_thread_url)
+    assert response.streaming
+    parts = [part.decode() for part in response.streaming_content]
+    assert news.title in parts[0]
+    assert not COMMENT_TEXT.search(parts[0])
+    chunks = [COMMENT_TEXT.findall(part) for part in parts[1:-1]]
+    assert [len(chunk) for chunk in chunks] == [50, 50, 50, 50, 22]
+    expected = Comment.objects.order_by('created', 'pk')
+    assert sum(chunks, []) == [comment.text for comment in expected]
+    assert parts[-1].rstrip().endswith('</html>')
+
+
+def test_thread_without_comments(client, news_thread_url):
+    response = client.get(news_thread_url)
+    content = b''.join(response.streaming_content).decode()
+    assert 'Здесь никто ничего не написал...' in content
+
+
+def test_thread_of_missing_news(client, news_thread_url, news):
+    news.delete()
+    assert client.get(news_thread_url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_admin_news_page_links_to_comments(admin_client, news, comment):
+    """Страница новости в админке не выводит форму на каждый комментарий."""
+    response = admin_client.get(
+        reverse('admin:news_news_change', args=(news.pk,))
+    )
+    content = response.content.decode()
+    assert 'comment_set-TOTAL_FORMS' not in content
+    assert f'?news__id__exact={news.pk}' in content
+
+
+def test_admin_comments_of_news_are_paginated(admin_client, news, comments):
+    response = admin_client.get(
+        reverse('admin:news_comment_changelist'),
+        {'news__id__exact': news.pk},
+    )
+    changelist = response.context['cl']
+    assert changelist.result_count == len(Comment.objects.all())
+    page = list(changelist.result_list)
+    assert len(page) == changelist.list_per_page
+    assert page == list(Comment.objects.order_by('-created', '-id')[
+        :changelist.list_per_page
+    ])
+
+
+def test_admin_search(admin_client, all_news, comment, author):
+    """Новости ищутся по индексу FTS5, комментарии — по имени автора."""
+    response = admin_client.get(
+        reverse('admin:news_news_changelist'), {'q': 'новость 12'}
+    )
+    titles = {news.title for news in response.context['cl'].result_list}
+    assert titles == {'Новость 12', *(f'Новость 12{i}' for i in range(10))}
+    url = reverse('admin:news_comment_changelist')
+    response = admin_client.get(url, {'q': author.username})
+    assert list(response.context['cl'].result_list) == [comment]
+    response = admin_client.get(url, {'q': 'кто-то другой'})
+    assert not response.context['cl'].result_list
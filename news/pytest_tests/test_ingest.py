@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from pytest_django.asserts import assertRedirects
+
+from news.benchmarks.ingest import run_mode
+from news.ingest import get_comment_buffer
+from news.models import Comment, News, PendingComment
+
+pytestmark = pytest.mark.django_db
+
+FORM_DATA = {'text': 'Комментарий в буфер'}
+
+
+@pytest.fixture
+def memory_buffer(settings):
+    settings.COMMENT_INGEST = {
+        'MODE': 'memory', 'BATCH_SIZE': 3, 'MAX_DELAY': None
+    }
+    yield get_comment_buffer()
+    settings.COMMENT_INGEST = {'MODE': None}
+
+
+@pytest.fixture
+def table_buffer(settings):
+    settings.COMMENT_INGEST = {
+        'MODE': 'table', 'BATCH_SIZE': 2, 'MAX_DELAY': None
+    }
+    yield get_comment_buffer()
+    settings.COMMENT_INGEST = {'MODE': None}
+
+
+def test_memory_buffer_writes_full_batch(
+        memory_buffer, author, author_client, news, news_detail_url
+):
+    """Комментарии копятся до размера пачки и пишутся одним разом."""
+    for text in ('Первый', 'Второй'):
+        response = author_client.post(news_detail_url, data={'text': text})
+        assertRedirects(
+            response, news_detail_url + '#comments',
+            fetch_redirect_response=False,
+        )
+    assert Comment.objects.count() == 0
+    memory_buffer.add(Comment(news=news, author=author, text='Третий'))
+    news.refresh_from_db()
+    assert Comment.objects.count() == news.comment_count == 3
+
+
+def test_table_buffer_is_flushed_by_command(
+        table_buffer, author_client, news, news_detail_url
+):
+    author_client.post(news_detail_url, data=FORM_DATA)
+    assert PendingComment.objects.count() == 1
+    assert Comment.objects.count() == 0
+    call_command('flush_comments')
+    news.refresh_from_db()
+    assert PendingComment.objects.count() == 0
+    assert news.comment_count == 1
+    assert Comment.objects.get().text == FORM_DATA['text']
+
+
+def test_buffered_comment_to_missing_news(memory_buffer, author_client):
+    response = author_client.post(
+        reverse('news:detail', args=(0,)), data=FORM_DATA
+    )
+    assert response.status_code == 404
+    assert memory_buffer.flush() == 0
+
+
+def test_comments_to_deleted_news_are_dropped(
+        memory_buffer, author_client, news, news_detail_url
+):
+    """Новость удалили, пока комментарий ждал в буфере."""
+    author_client.post(news_detail_url, data=FORM_DATA)
+    News.objects.all().delete()
+    assert memory_buffer.flush() == 0
+    assert Comment.objects.count() == 0
+
+
+def test_repeats_within_batch_are_dropped(memory_buffer, author, news):
+    """Повторы, ещё не записанные в базу, отбрасываются при записи пачки."""
+    memory_buffer.add(Comment(news=news, author=author, text='Купи!'))
+    memory_buffer.add(Comment(news=news, author=author, text='купи'))
+    assert memory_buffer.flush() == 1
+    news.refresh_from_db()
+    assert Comment.objects.count() == news.comment_count == 1
+    assert Comment.objects.get().fingerprint
+
+
+@pytest.mark.parametrize('buffer', ('memory_buffer', 'table_buffer'))
+def test_buffered_comment_keeps_accept_time(
+        request, buffer, author, news
+):
+    """
+    Время комментария — когда его приняли, а не когда записали пачку:
+    от него зависят порядок, окно повторов и периоды лидеров.
+    """
+    comment_buffer = request.getfixturevalue(buffer)
+    accepted = timezone.now() - timedelta(minutes=5)
+    comment_buffer.add(
+        Comment(news=news, author=author, text='Текст', created=accepted)
+    )
+    comment_buffer.flush()
+    assert Comment.objects.get().created == accepted
+
+
+@pytest.mark.parametrize('mode', ('memory', 'table'))
+def test_concurrent_buffered_writes_are_complete(mode):
+    """Под нагрузкой все принятые комментарии записываются и считаются."""
+    result = run_mode(mode, threads=4, posts=5, batch_size=3)
+    assert result['accepted'] == result['written'] == 20
+    assert result['consistent']
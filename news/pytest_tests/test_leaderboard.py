@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from news.ingest import write_comments
+from news.leaderboard import get_leaders
+from news.models import Comment, LeaderboardEntry, News
+
+pytestmark = pytest.mark.django_db
+
+
+def get_counts():
+    return {
+        (entry.period, entry.news_id): entry.comment_count
+        for entry in LeaderboardEntry.objects.filter(comment_count__gt=0)
+    }
+
+
+@pytest.fixture
+def other_news():
+    return News.objects.create(title='Другая новость', text='Текст')
+
+
+def test_site_comments_update_leaderboard(
+        author_client, client, home_url, news, other_news, news_detail_url
+):
+    """Комментарии через сайт сразу попадают в блок на главной."""
+    for index in range(2):
+        author_client.post(news_detail_url, data={'text': f'Текст {index}'})
+    author_client.post(
+        reverse('news:detail', args=(other_news.pk,)),
+        data={'text': 'Текст'},
+    )
+    response = client.get(home_url)
+    leaders = response.context['most_discussed']
+    assert [(entry.news, entry.comment_count) for entry in leaders] == [
+        (news, 2), (other_news, 1)
+    ]
+    assert 'Обсуждают на этой неделе' in response.content.decode()
+
+    comment = Comment.objects.filter(news=news).first()
+    author_client.post(reverse('news:delete', args=(comment.pk,)))
+    assert get_counts() == {
+        ('day', news.pk): 1, ('week', news.pk): 1,
+        ('day', other_news.pk): 1, ('week', other_news.pk): 1,
+    }
+
+
+def test_buffered_comments_update_leaderboard(author, news):
+    write_comments([
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(3)
+    ])
+    assert get_counts() == {('day', news.pk): 3, ('week', news.pk): 3}
+
+
+def test_rebuild_drops_comments_outside_period(author, news, other_news):
+    """
+    Команда пересчитывает периоды по времени комментариев,
+    включая архив, и совпадает с тем, что накопилось по событиям.
+    """
+    write_comments([
+        Comment(news=news, author=author, text='Свежий'),
+        Comment(news=other_news, author=author, text='Свежий'),
+    ])
+    incremental = get_counts()
+    call_command('rebuild_leaderboard')
+    assert get_counts() == incremental
+
+    now = timezone.now()
+    Comment.objects.filter(news=news).update(created=now - timedelta(days=2))
+    Comment.objects.filter(
+        news=other_news
+    ).update(created=now - timedelta(days=8))
+    News.objects.update(date=now.date() - timedelta(days=1))
+    call_command('archive_comments', older_than_days=0)
+    assert not Comment.objects.exists()
+    call_command('rebuild_leaderboard')
+    assert get_counts() == {('week', news.pk): 1}
+    assert [entry.news for entry in get_leaders('week', 5)] == [news]
+
+
+def test_home_title_follows_period(
+        author_client, client, home_url, news_detail_url, settings
+):
+    settings.LEADERBOARD_HOME_PERIOD = 'day'
+    author_client.post(news_detail_url, data={'text': 'Текст'})
+    content = client.get(home_url).content.decode()
+    assert settings.LEADERBOARD_PERIOD_TITLES['day'] in content
+    assert settings.LEADERBOARD_PERIOD_TITLES['week'] not in content
+
+
+def test_deleting_old_comment_keeps_fresh_periods(
+        author_client, author, news, comment
+):
+    """Комментарий, выпавший из суток, вычитается только из недели."""
+    write_comments([Comment(news=news, author=author, text='Свежий')])
+    Comment.objects.filter(pk=comment.pk).update(
+        created=timezone.now() - timedelta(days=2)
+    )
+    call_command('rebuild_leaderboard')
+    author_client.post(reverse('news:delete', args=(comment.pk,)))
+    assert get_counts() == {('day', news.pk): 1, ('week', news.pk): 1}
@@ -1,12 +1,19 @@
+import json
+from datetime import timedelta
 from http import HTTPStatus
 
 import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import (
     assertRedirects
 )
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.forms import BAD_WORDS, DUPLICATE_WARNING, WARNING, CommentForm
+from news.models import Comment, News, text_fingerprint
+from news.moderation import BadWordsFilter
 
 pytestmark = pytest.mark.django_db
 
@@ -73,6 +80,24 @@ def test_user_cant_use_bad_words(news_detail_url, author_client, word):
     assert Comment.objects.count() == 0
 
 
+def test_bad_words_are_reported_in_one_pass():
+    """Фильтр за один проход находит все стоп-слова, включая повторы."""
+    bad_words_filter = BadWordsFilter(('ред', 'редиска', 'негодяй'))
+    text = 'Ред, ты РЕДИСКА и негодяй, просто редиска!'
+    assert bad_words_filter.find_all(text) == [
+        'ред', 'редиска', 'негодяй', 'редиска'
+    ]
+    assert 'Обычный текст' not in bad_words_filter
+
+
+def test_form_error_lists_found_bad_words():
+    """Ошибка формы содержит все найденные стоп-слова."""
+    form = CommentForm(data=get_bad_words_data(' и '.join(BAD_WORDS)))
+    assert not form.is_valid()
+    error, = form.errors.as_data()['text']
+    assert error.params['words'] == list(BAD_WORDS)
+
+
 def test_author_can_edit_note(
         news,
         author_client,
@@ -129,3 +154,279 @@ def test_other_user_cant_delete_note(
     assert comment.text == comment_after.text
     assert comment.author == comment_after.author
     assert comment.news == comment_after.news
+
+
+def test_comment_counter_follows_create_and_delete(
+        news, news_detail_url, author_client
+):
+    """Создание и удаление комментария через сайт меняют счётчик новости."""
+    author_client.post(news_detail_url, data=FORM_DATA)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+    comment = Comment.objects.get()
+    author_client.post(reverse('news:delete', args=(comment.pk,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_comment_counter_follows_admin(admin_client, news, author):
+    """Комментарии, добавленные и удалённые в админке, учтены в счётчике."""
+    add_url = reverse('admin:news_comment_add')
+    for text in ('Первый', 'Второй', 'Третий'):
+        response = admin_client.post(add_url, {
+            'news': news.pk, 'author': author.pk, 'text': text,
+        })
+        assert response.status_code == HTTPStatus.FOUND
+    news.refresh_from_db()
+    assert news.comment_count == 3
+
+    first, second, third = Comment.objects.all()
+    admin_client.post(
+        reverse('admin:news_comment_delete', args=(first.pk,)),
+        {'post': 'yes'},
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+    admin_client.post(reverse('admin:news_comment_changelist'), {
+        'action': 'delete_selected',
+        '_selected_action': [second.pk, third.pk],
+        'post': 'yes',
+    })
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    assert not Comment.objects.exists()
+
+
+def test_comment_counter_drift_is_reported_and_rebuilt(news, comment):
+    """Проверка находит расхождение, а пересчёт его устраняет."""
+    with pytest.raises(CommandError):
+        call_command('check_comment_counts')
+    call_command('rebuild_comment_counts', chunk_size=1)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    call_command('check_comment_counts')
+
+
+def test_import_news_skips_duplicates(tmp_path, news):
+    """Импорт пропускает дубликаты — и в файле, и уже имеющиеся в базе."""
+    news.refresh_from_db()
+    lines = [
+        {'title': news.title, 'text': 'Уже есть', 'date': str(news.date)},
+        {'title': 'Новая', 'text': 'Текст', 'date': '2022-11-02'},
+        {'title': 'Новая', 'text': 'Повтор', 'date': '2022-11-02'},
+        {'title': 'Ещё одна', 'text': 'Текст', 'date': '2022-11-03'},
+    ]
+    path = tmp_path / 'news.jsonl'
+    path.write_text(
+        '\n'.join(json.dumps(line, ensure_ascii=False) for line in lines)
+        + '\nне json\n',
+        encoding='utf-8',
+    )
+    call_command('import_news', str(path), chunk_size=2)
+    assert sorted(News.objects.values_list('title', flat=True)) == sorted(
+        [news.title, 'Новая', 'Ещё одна']
+    )
+
+
+def test_import_news_chunk_fits_old_sqlite(tmp_path, news, old_sqlite_limit):
+    """Порция по умолчанию сверяется с базой в пределах 999 параметров."""
+    news.refresh_from_db()
+    lines = [
+        {'title': f'Новость {index}', 'text': 'Текст', 'date': '2022-11-02'}
+        for index in range(999)
+    ]
+    lines.append(
+        {'title': news.title, 'text': 'Уже есть', 'date': str(news.date)}
+    )
+    path = tmp_path / 'news.jsonl'
+    path.write_text(
+        '\n'.join(json.dumps(line, ensure_ascii=False) for line in lines),
+        encoding='utf-8',
+    )
+    call_command('import_news', str(path))
+    assert News.objects.count() == 1000
+
+
+def test_import_news_skips_rows_without_text(tmp_path):
+    """Пустые и не строковые поля не роняют транзакцию порции."""
+    lines = [
+        {'title': 'Без текста', 'text': None, 'date': '2022-11-02'},
+        {'title': 'Пустой текст', 'text': ' ', 'date': '2022-11-02'},
+        {'title': 42, 'text': 'Текст', 'date': '2022-11-02'},
+        {'title': 'Нормальная', 'text': 'Текст', 'date': '2022-11-02'},
+    ]
+    path = tmp_path / 'news.jsonl'
+    path.write_text(
+        '\n'.join(json.dumps(line, ensure_ascii=False) for line in lines),
+        encoding='utf-8',
+    )
+    call_command('import_news', str(path))
+    assert list(News.objects.values_list('title', flat=True)) == [
+        'Нормальная'
+    ]
+
+
+# Сессия и пользователь после входа берутся из кэша (news/auth.py),
+# поэтому AuthenticationMiddleware к базе не обращается.
+AUTH_QUERIES = 0
+# SAVEPOINT и RELEASE SAVEPOINT вокруг транзакции представления.
+ATOMIC_QUERIES = 2
+
+
+def test_create_comment_query_budget(
+        author_client, news, news_detail_url, django_assert_num_queries
+):
+    """
+    Создание комментария: проверка повторов по индексу,
+    UPDATE счётчика новости, INSERT комментария и UPSERT
+    в таблицу самых обсуждаемых.
+    """
+    with django_assert_num_queries(AUTH_QUERIES + ATOMIC_QUERIES + 4):
+        response = author_client.post(news_detail_url, data=FORM_DATA)
+    assertRedirects(
+        response, news_detail_url + '#comments', fetch_redirect_response=False
+    )
+
+
+def test_edit_comment_query_budget(
+        author_client, comment, comment_edit_url, django_assert_num_queries
+):
+    """Правка: SELECT комментария, UPDATE текста и отметка у новости."""
+    with django_assert_num_queries(AUTH_QUERIES + ATOMIC_QUERIES + 3):
+        response = author_client.post(comment_edit_url, data=FORM_DATA)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_delete_comment_query_budget(
+        author_client, comment, comment_delete_url, django_assert_num_queries
+):
+    """
+    Удаление: SELECT и DELETE комментария, UPDATE счётчика новости
+    и UPDATE таблицы самых обсуждаемых.
+    """
+    with django_assert_num_queries(AUTH_QUERIES + ATOMIC_QUERIES + 4):
+        response = author_client.post(comment_delete_url)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_comment_to_missing_news(author_client):
+    """Комментарий к несуществующей новости не создаётся."""
+    url = reverse('news:detail', args=(0,))
+    response = author_client.post(url, data=FORM_DATA)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert Comment.objects.count() == 0
+
+
+def test_invalid_comment_keeps_comments_on_page(
+        author_client, comment, news_detail_url
+):
+    """При ошибке в форме страница новости показывает комментарии."""
+    response = author_client.post(
+        news_detail_url, data=get_bad_words_data(BAD_WORDS[0])
+    )
+    assert list(response.context['comments']) == [comment]
+
+
+def test_text_fingerprint_ignores_case_and_punctuation():
+    assert text_fingerprint('Купи  СЕЙЧАС!!!') == text_fingerprint(
+        'купи сейчас'
+    )
+    assert text_fingerprint('купи сейчас') != text_fingerprint('купи потом')
+
+
+def test_text_fingerprint_of_text_without_words():
+    """Эмодзи и знаки препинания не сливаются с пустой строкой."""
+    assert text_fingerprint('👍') != text_fingerprint('🔥')
+    assert text_fingerprint('???') != text_fingerprint('')
+    assert text_fingerprint(' 👍  👍 ') == text_fingerprint('👍 👍')
+
+
+def test_recent_duplicate_is_rejected(
+        author_client, django_user_model, client, news, news_detail_url
+):
+    """
+    Повтор текста от того же автора или к той же новости
+    отклоняется до записи, как и ругательство.
+    """
+    author_client.post(news_detail_url, data=FORM_DATA)
+    response = author_client.post(
+        news_detail_url, data={'text': f'  {FORM_DATA["text"].upper()}!'}
+    )
+    assert DUPLICATE_WARNING in response.context['form'].errors['text']
+    client.force_login(django_user_model.objects.create(username='Другой'))
+    response = client.post(news_detail_url, data=FORM_DATA)
+    assert DUPLICATE_WARNING in response.context['form'].errors['text']
+    other_news = News.objects.create(title='Другая', text='Текст')
+    response = client.post(
+        reverse('news:detail', args=(other_news.pk,)), data=FORM_DATA
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.count() == 2
+
+
+def test_old_duplicate_is_allowed(author_client, news, news_detail_url):
+    author_client.post(news_detail_url, data=FORM_DATA)
+    Comment.objects.update(created=timezone.now() - timedelta(
+        seconds=settings.COMMENT_DUPLICATE_WINDOW + 1
+    ))
+    author_client.post(news_detail_url, data=FORM_DATA)
+    assert Comment.objects.count() == 2
+
+
+def test_collapse_duplicate_comments(news, author, django_user_model):
+    """
+    Команда удаляет повторы по тому же правилу, что и проверка
+    при отправке, и оставляет самый ранний комментарий.
+    """
+    other_news = News.objects.create(title='Другая', text='Текст')
+    other_author = django_user_model.objects.create(username='Другой')
+    third_author = django_user_model.objects.create(username='Третий')
+    # bulk_create не заполняет отпечатки: это сделает команда.
+    Comment.objects.bulk_create([
+        Comment(news=news, author=author, text='Реклама!'),
+        Comment(news=news, author=other_author, text='реклама'),
+        Comment(news=other_news, author=third_author, text='Реклама'),
+        Comment(news=news, author=author, text='РЕКЛАМА'),
+        Comment(news=other_news, author=author, text='Реклама'),
+        Comment(news=news, author=author, text='Обычный комментарий'),
+    ])
+    comments = list(Comment.objects.order_by('pk'))
+    kept, _, other_kept, fresh, _, usual = comments
+    # Повтор не позже чем через окно после оставленного удаляется,
+    # более поздний остаётся, как и на сайте.
+    Comment.objects.filter(
+        pk__in=[comment.pk for comment in comments[:3]]
+    ).update(created=timezone.now() - timedelta(
+        seconds=settings.COMMENT_DUPLICATE_WINDOW + 1
+    ))
+    News.objects.rebuild_comment_counts()
+    call_command('collapse_duplicate_comments', chunk_size=1)
+    assert set(Comment.objects.values_list('pk', flat=True)) == {
+        kept.pk, other_kept.pk, fresh.pk, usual.pk
+    }
+    assert not Comment.objects.filter(fingerprint='').exists()
+    assert not News.objects.with_comment_count_drift().exists()
+
+
+def test_collapse_many_repeats_fits_old_sqlite(
+        news, author, old_sqlite_limit
+):
+    """Повторы одного отпечатка удаляются частями по MAX_IN_PARAMS."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Реклама') for _ in range(1001)
+    )
+    News.objects.rebuild_comment_counts()
+    call_command('collapse_duplicate_comments')
+    assert Comment.objects.count() == 1
+    assert not News.objects.with_comment_count_drift().exists()
+
+
+def test_collapse_duplicate_comments_dry_run(news, author):
+    for text in ('Реклама', 'реклама!'):
+        Comment.objects.create(news=news, author=author, text=text)
+    call_command('collapse_duplicate_comments', dry_run=True)
+    assert Comment.objects.count() == 2
+    call_command('collapse_duplicate_comments')
+    assert Comment.objects.count() == 1
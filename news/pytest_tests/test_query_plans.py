@@ -0,0 +1,97 @@
+from datetime import date
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+from news.models import Comment, News
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Планы запросов разбираются в формате SQLite.'
+    ),
+]
+
+NEWS_TABLES = ('news_news', 'news_comment', 'news_archivedcomment')
+
+
+def get_query_plans(client, url):
+    """Возвращает планы всех запросов к таблицам новостей при GET url."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    plans = []
+    for query in context.captured_queries:
+        sql = query['sql']
+        if not sql.startswith('SELECT') or not any(
+            table in sql for table in NEWS_TABLES
+        ):
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+    return response, plans
+
+
+def assert_no_full_scans(plans):
+    for sql, steps in plans:
+        for step in steps:
+            assert not (step.startswith('SCAN') and 'USING' not in step), (
+                f'Полный просмотр таблицы: {step}\n{sql}'
+            )
+            assert 'TEMP B-TREE' not in step, (
+                f'Сортировка без индекса: {step}\n{sql}'
+            )
+
+
+def test_news_list_uses_indexes(client, home_url, all_news, comments):
+    """Лента на главной читается по индексу (date, id)."""
+    _, plans = get_query_plans(client, home_url)
+    assert plans
+    assert_no_full_scans(plans)
+
+
+def test_news_detail_uses_indexes(client, news_detail_url, comments):
+    """
+    Страница новости и следующая порция комментариев
+    читаются по индексу (news_id, created).
+    """
+    response, plans = get_query_plans(client, news_detail_url)
+    assert plans
+    assert_no_full_scans(plans)
+    _, plans = get_query_plans(client, response.context['next_comments_url'])
+    assert plans
+    assert_no_full_scans(plans)
+
+
+def test_archived_news_detail_uses_indexes(
+        client, news, news_detail_url, comments
+):
+    """Архив читается по своему индексу (news_id, created)."""
+    News.objects.filter(pk=news.pk).update(date=date(2000, 1, 1))
+    call_command('archive_comments')
+    response, plans = get_query_plans(client, news_detail_url)
+    assert any('news_archivedcomment' in sql for sql, _ in plans)
+    assert_no_full_scans(plans)
+    _, plans = get_query_plans(client, response.context['next_comments_url'])
+    assert_no_full_scans(plans)
+
+
+def test_admin_comments_of_news_use_indexes(admin_client, news, comments):
+    """Список комментариев новости в админке идёт по (news_id, created)."""
+    url = reverse('admin:news_comment_changelist')
+    url = f'{url}?news__id__exact={news.pk}'
+    _, plans = get_query_plans(admin_client, url)
+    assert plans
+    assert_no_full_scans(plans)
+
+
+def test_duplicate_check_uses_fingerprint_index(news, author, comments):
+    plan = Comment.objects.recent_duplicates(
+        news.pk, author.pk, 'Текст заметки 1', timezone.now()
+    ).explain()
+    assert 'comment_fingerprint_idx' in plan
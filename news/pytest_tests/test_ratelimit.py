@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from news.models import Comment
+from yanews.middleware import RateLimitMiddleware
+
+pytestmark = pytest.mark.django_db
+
+BURST = settings.RATE_LIMIT['ROUTES']['news:detail']['BURST']
+
+
+def form_data(index):
+    # Одинаковые комментарии отклонила бы проверка повторов.
+    return {'text': f'Текст комментария {index}'}
+
+
+def test_comment_burst_is_rejected_before_orm(
+        author_client, news, news_detail_url, django_assert_num_queries
+):
+    """Запрос сверх лимита отклоняется без обращения к базе."""
+    for index in range(BURST):
+        author_client.post(news_detail_url, data=form_data(index))
+    with django_assert_num_queries(0):
+        response = author_client.post(
+            news_detail_url, data=form_data(BURST)
+        )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response['Retry-After']) > 0
+    assert Comment.objects.count() == BURST
+
+
+def test_limit_follows_user_across_addresses(
+        author_client, django_user_model, client, news, news_detail_url
+):
+    """Смена IP не обходит лимит пользователя, а другой читатель не задет."""
+    for index in range(BURST):
+        author_client.post(
+            news_detail_url, data=form_data(index),
+            REMOTE_ADDR=f'10.0.0.{index}',
+        )
+    response = author_client.post(
+        news_detail_url, data=form_data(BURST), REMOTE_ADDR='10.0.1.1'
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    client.force_login(django_user_model.objects.create(username='Читатель'))
+    response = client.post(
+        news_detail_url, data=form_data('читателя'), REMOTE_ADDR='10.0.1.2'
+    )
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_signup_is_limited_by_address(client):
+    url = reverse('users:signup')
+    limit = settings.RATE_LIMIT['ROUTES']['users:signup']['BURST']
+    for _ in range(limit):
+        client.post(url, data={})
+    response = client.post(url, data={})
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert client.get(url).status_code == HTTPStatus.OK
+
+
+def test_requests_without_address_share_one_bucket():
+    """Запросы без REMOTE_ADDR (ASGI без client) ограничены общим ведром."""
+    url = reverse('users:signup')
+    limit = settings.RATE_LIMIT['ROUTES']['users:signup']['BURST']
+    middleware = RateLimitMiddleware(lambda request: None)
+
+    def post(**meta):
+        request = RequestFactory().post(url, **meta)
+        request.META.pop('REMOTE_ADDR', None)
+        request.META.update(meta)
+        request.resolver_match = resolve(url)
+        request.user = AnonymousUser()
+        return middleware.process_view(request, None, (), {})
+
+    for _ in range(limit):
+        assert post() is None
+    assert post().status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert post(REMOTE_ADDR='10.0.2.1') is None
@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from yanews.routers import (
+    PRIMARY, PrimaryReplicaRouter, RoutingState, routing_state
+)
+
+
+@pytest.fixture
+def scenario(tmp_path):
+    completed = subprocess.run(
+        [
+            sys.executable, '-m', 'news.pytest_tests.replica_scenario',
+            str(tmp_path),
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def test_reads_go_to_replica_and_writer_is_pinned(scenario):
+    """
+    Читатель видит данные реплики, а автор комментария сразу
+    видит свой комментарий, пока реплика отстаёт.
+    """
+    assert scenario == {
+        'reader_status': 200,
+        'pinned': True,
+        'writer_sees_own_comment': True,
+        'reader_sees_comment_before_replication': False,
+        'reader_sees_comment_after_replication': True,
+    }
+
+
+def test_writes_always_go_to_primary():
+    router = PrimaryReplicaRouter()
+    token = routing_state.set(RoutingState(use_replica=True))
+    try:
+        assert router.db_for_write(None) == PRIMARY
+        assert routing_state.get().wrote
+        assert router.db_for_read(None) == PRIMARY
+    finally:
+        routing_state.reset(token)
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from news.checks import check_search_index_triggers
+from news.models import News
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Индекс FTS5 есть только в SQLite.'
+    ),
+]
+
+
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
+
+
+def found_titles(client, search_url, query, **params):
+    response = client.get(search_url, {'q': query, **params})
+    assert response.status_code == HTTPStatus.OK
+    return [news.title for news in response.context['object_list']]
+
+
+def test_search_ranks_title_matches_first(client, search_url):
+    """Совпадение в заголовке выше совпадения в тексте; ищутся префиксы."""
+    News.objects.create(title='Погода', text='В выходные ожидаются дожди.')
+    News.objects.create(title='Дожди в Москве', text='Осень.')
+    News.objects.create(title='Спорт', text='Матч отменён.')
+    assert found_titles(client, search_url, 'дожд') == [
+        'Дожди в Москве', 'Погода'
+    ]
+
+
+def test_search_index_follows_changes(client, search_url, news):
+    """Индекс обновляется при правке и удалении новости."""
+    news.title = 'Переименованная новость'
+    news.save()
+    assert found_titles(client, search_url, 'переименованная') == [
+        news.title
+    ]
+    news.delete()
+    assert found_titles(client, search_url, 'переименованная') == []
+
+
+def test_search_is_paginated(client, search_url, all_news):
+    """Результаты выводятся страницами со ссылкой на следующую."""
+    response = client.get(search_url, {'q': 'новость'})
+    assert len(response.context['object_list']) == (
+        settings.SEARCH_RESULTS_ON_PAGE
+    )
+    next_page = client.get(response.context['next_page_url'])
+    assert not set(next_page.context['object_list']) & set(
+        response.context['object_list']
+    )
+
+
+@pytest.mark.parametrize('page, status', (
+    ('0', HTTPStatus.NOT_FOUND),
+    (str(settings.SEARCH_MAX_PAGE + 1), HTTPStatus.NOT_FOUND),
+    ('1000000000000000000', HTTPStatus.NOT_FOUND),
+    ('первая', HTTPStatus.BAD_REQUEST),
+))
+def test_search_rejects_pages_out_of_range(
+        client, search_url, news, page, status
+):
+    """Номер страницы ограничен SEARCH_MAX_PAGE."""
+    response = client.get(search_url, {'q': 'новость', 'page': page})
+    assert response.status_code == status
+
+
+def test_search_ignores_fts_syntax(client, search_url, news):
+    """Служебный синтаксис FTS5 во вводе не ломает поиск."""
+    assert found_titles(client, search_url, 'NEAR("*') == []
+
+
+def test_rebuild_search_index(client, search_url, news):
+    """Команда заново наполняет индекс из таблицы новостей."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_news_fts(news_news_fts) VALUES ('delete-all')"
+        )
+    assert found_titles(client, search_url, 'комментарием') == []
+    call_command('rebuild_search_index')
+    assert found_titles(client, search_url, 'комментарием') == [news.title]
+
+
+def test_missing_fts_trigger_fails_check():
+    """Проверка базы замечает пропавший после миграций триггер индекса."""
+    assert check_search_index_triggers(None, databases=['default']) == []
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TRIGGER news_news_fts_update')
+    errors = check_search_index_triggers(None, databases=['default'])
+    assert [error.id for error in errors] == ['news.E002']
+    assert 'news_news_fts_update' in errors[0].msg
@@ -0,0 +1,92 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test.utils import override_settings
+
+from news.management.commands.check_static import VENDORED_ASSETS, sri_hash
+from yanews.static import IMMUTABLE_CACHE_CONTROL
+from yanews.storage import (
+    CompressedManifestStaticFilesStorage, gzip_compress
+)
+
+BOOTSTRAP = 'vendor/bootstrap/bootstrap.min.css'
+# Остальные тесты работают с хранилищем без манифеста (conftest.py).
+MANIFEST_STORAGE = 'yanews.storage.CompressedManifestStaticFilesStorage'
+
+
+@pytest.fixture(scope='module')
+def static_root(tmp_path_factory):
+    """Статика, собранная collectstatic во временный каталог."""
+    root = tmp_path_factory.mktemp('static')
+    with override_settings(
+        STATIC_ROOT=root, STATICFILES_STORAGE=MANIFEST_STORAGE
+    ):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        yield root
+
+
+def test_vendored_assets_match_pinned_hashes():
+    for name, expected in VENDORED_ASSETS.items():
+        assert sri_hash(Path(settings.STATICFILES_DIRS[0]) / name) == expected
+
+
+@pytest.mark.django_db
+def test_pages_do_not_use_cdn(client, home_url):
+    content = client.get(home_url).content.decode()
+    assert 'cdn.jsdelivr.net' not in content
+    assert static(BOOTSTRAP) in content
+
+
+def test_collectstatic_writes_hashed_compressed_files(static_root):
+    hashed = static(BOOTSTRAP)
+    assert hashed != settings.STATIC_URL + BOOTSTRAP
+    path = static_root / hashed[len(settings.STATIC_URL):]
+    original = path.read_bytes()
+    assert gzip.decompress(Path(f'{path}.gz').read_bytes()) == original
+    assert Path(f'{path}.br').stat().st_size < len(original)
+
+
+def test_missing_manifest_fails_outside_debug(settings, tmp_path):
+    """Без collectstatic имена без хэша допустимы только в DEBUG."""
+    storage = CompressedManifestStaticFilesStorage(location=tmp_path)
+    with pytest.raises(ValueError):
+        storage.stored_name(BOOTSTRAP)
+    settings.DEBUG = True
+    assert storage.stored_name(BOOTSTRAP) == BOOTSTRAP
+
+
+def test_compression_is_reproducible():
+    data = (Path(settings.STATICFILES_DIRS[0]) / BOOTSTRAP).read_bytes()
+    assert gzip_compress(data) == gzip_compress(data)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('accept, encoding', (
+    ('gzip, deflate, br', 'br'),
+    ('gzip', 'gzip'),
+    ('br;q=0, gzip', 'gzip'),
+    ('', None),
+))
+def test_hashed_files_are_served_immutable(
+        client, static_root, accept, encoding
+):
+    response = client.get(static(BOOTSTRAP), HTTP_ACCEPT_ENCODING=accept)
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/css'
+    assert response.get('Content-Encoding') == encoding
+    assert response['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert response['Vary'] == 'Accept-Encoding'
+
+
+@pytest.mark.django_db
+def test_unhashed_files_are_not_immutable(client, static_root):
+    response = client.get(settings.STATIC_URL + BOOTSTRAP)
+    assert response['Cache-Control'] != IMMUTABLE_CACHE_CONTROL
+    missing = client.get(settings.STATIC_URL + 'vendor/missing.css')
+    assert missing.status_code == 404
+    outside = client.get(settings.STATIC_URL + '../manage.py')
+    assert outside.status_code == 400
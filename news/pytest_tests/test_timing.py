@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from news.models import Comment
+from yanews.middleware import QueryBudgetExceeded
+
+pytestmark = pytest.mark.django_db
+
+
+def test_server_timing_header(client, home_url, news):
+    """В ответе есть заголовок Server-Timing с числом SQL-запросов."""
+    response = client.get(home_url)
+    timing = response['Server-Timing']
+    assert 'db;dur=' in timing and 'desc="2 queries"' in timing
+    for metric in ('view;dur=', 'tpl;dur=', 'total;dur='):
+        assert metric in timing
+
+
+def test_query_budget_exceeded_raises(client, settings, home_url, news):
+    """Превышение бюджета запросов для маршрута — ошибка."""
+    settings.REQUEST_TIMING = {
+        'ENABLED': True,
+        'QUERY_BUDGETS': {'news:home': 0},
+        'RAISE_ON_BUDGET': True,
+    }
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(home_url)
+
+
+def test_query_budget_exceeded_is_logged(
+        client, settings, home_url, news, caplog
+):
+    settings.REQUEST_TIMING = {
+        'ENABLED': True,
+        'QUERY_BUDGETS': {'news:home': 0},
+    }
+    client.get(home_url)
+    assert 'GET news:home: 2 SQL-запросов при бюджете 0' in caplog.text
+
+
+def test_live_settings_only_log_budget_overruns():
+    """Исключение после записи в базу отдало бы клиенту 500."""
+    from yanews import settings as live_settings
+
+    assert not live_settings.REQUEST_TIMING['RAISE_ON_BUDGET']
+
+
+def test_budget_by_name_skips_unsafe_methods(
+        author_client, client, author, settings, news, news_detail_url
+):
+    """Бюджет по имени маршрута относится только к GET и HEAD."""
+    settings.REQUEST_TIMING = {
+        **settings.REQUEST_TIMING,
+        'QUERY_BUDGETS': {'news:detail': 0},
+    }
+    response = author_client.post(news_detail_url, data={'text': 'Текст'})
+    assert response.status_code == HTTPStatus.FOUND
+    settings.REQUEST_TIMING = {
+        **settings.REQUEST_TIMING,
+        'QUERY_BUDGETS': {('news:detail', 'POST'): 0},
+    }
+    # Настройки middleware читает при создании: нужен новый клиент.
+    client.force_login(author)
+    with pytest.raises(QueryBudgetExceeded):
+        client.post(news_detail_url, data={'text': 'Другой текст'})
+
+
+def test_write_budgets_hold_with_cold_cache(
+        author_client, news, news_detail_url
+):
+    """
+    Сессия и пользователь из базы, а не из кэша: запись
+    укладывается в бюджеты из настроек.
+    """
+    cache.clear()
+    author_client.post(news_detail_url, data={'text': 'Текст'})
+    comment = Comment.objects.get()
+    cache.clear()
+    author_client.post(
+        reverse('news:edit', args=(comment.pk,)), data={'text': 'Правка'}
+    )
+    cache.clear()
+    response = author_client.post(reverse('news:delete', args=(comment.pk,)))
+    assert response.status_code == HTTPStatus.FOUND
+    assert not Comment.objects.exists()
+
+
+def test_disabled_timing_is_not_installed(client, settings, home_url):
+    """Выключенная middleware исключается из цепочки обработки."""
+    settings.REQUEST_TIMING = {'ENABLED': False}
+    assert 'Server-Timing' not in client.get(home_url)
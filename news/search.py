@@ -0,0 +1,79 @@
+"""Полнотекстовый поиск по заголовкам и текстам новостей."""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import News
+
+FTS_TABLE = 'news_news_fts'
+# Совпадение в заголовке весит больше, чем в тексте.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+WORD_RE = re.compile(r'\w+')
+
+
+def build_match_query(query):
+    """
+    Превращает пользовательский ввод в запрос FTS5.
+
+    Каждое слово берётся в кавычки, поэтому синтаксис FTS5 во вводе
+    не действует, и ищется как префикс: «новост» найдёт «новости».
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query.lower()))
+
+
+def substring_condition(query):
+    """Каждое слово запроса есть в заголовке или в тексте."""
+    condition = Q()
+    for word in WORD_RE.findall(query):
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    return condition
+
+
+def search_news(query, offset, limit):
+    """Новости, подходящие под запрос, от самых релевантных."""
+    match = build_match_query(query)
+    if not match:
+        return []
+    if connection.vendor != 'sqlite':
+        # Индекс FTS5 есть только в SQLite, на других базах — простой
+        # поиск подстроки без ранжирования.
+        news = News.objects.filter(substring_condition(query))
+        return list(news[offset:offset + limit])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s OFFSET %s',
+            [match, TITLE_WEIGHT, TEXT_WEIGHT, limit, offset],
+        )
+        news_ids = [news_id for news_id, in cursor.fetchall()]
+    news_by_id = News.objects.in_bulk(news_ids)
+    return [news_by_id[pk] for pk in news_ids if pk in news_by_id]
+
+
+def filter_news(queryset, query):
+    """
+    Оставляет в queryset только новости, подходящие под запрос.
+
+    Порядок queryset не меняется, поэтому так ищет список новостей
+    в админке, где сортировку выбирает модератор.
+    """
+    match = build_match_query(query)
+    if not match:
+        return queryset
+    if connection.vendor != 'sqlite':
+        return queryset.filter(substring_condition(query))
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match],
+    ))
+
+
+def rebuild_search_index():
+    """Заново строит индекс по всем новостям."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
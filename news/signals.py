@@ -0,0 +1,70 @@
+"""
+Сброс кэша главной страницы и кэша пользователей.
+
+Версия ленты меняется только после фиксации транзакции: иначе
+параллельный запрос успел бы закэшировать старые данные под новой версией.
+"""
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import forget_user, remember_user
+from .cache import get_feed_items, invalidate_feed
+from .models import ArchivedComment, Comment, News
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_feed_on_news_change(sender, instance, signal, **kwargs):
+    """
+    Сбрасываем кэш главной, если новость была в ленте
+    или после сохранения попадает в неё.
+    """
+    items = get_feed_items()
+    if items is None:
+        transaction.on_commit(invalidate_feed)
+        return
+    news_ids, boundary = items
+    if instance.pk in news_ids:
+        transaction.on_commit(invalidate_feed)
+    elif signal is post_save and (
+        boundary is None
+        or (News._meta.get_field('date').to_python(instance.date),
+            instance.pk) > boundary
+    ):
+        transaction.on_commit(invalidate_feed)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=ArchivedComment)
+def invalidate_feed_on_comment_change(sender, instance, **kwargs):
+    """Счётчики комментариев на главной есть только у новостей из ленты."""
+    items = get_feed_items()
+    if items is None or instance.news_id in items[0]:
+        transaction.on_commit(invalidate_feed)
+
+
+@receiver(user_logged_in)
+def remember_logged_in_user(sender, user, **kwargs):
+    """Первый запрос после входа уже не обращается к auth_user."""
+    remember_user(user)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_changed_user(sender, instance, **kwargs):
+    """
+    После смены пароля, блокировки или удаления пользователь
+    перечитывается из базы, как только изменения зафиксированы.
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user(user_id))
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 # Импортируем функцию для получения модели пользователя.
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils import timezone
 # Импортируем функцию reverse(), она понадобится для получения адреса страницы.
@@ -38,6 +39,10 @@ class TestHomePage(TestCase):
         ]
         News.objects.bulk_create(all_news)
 
+    def setUp(self):
+        # Главная страница кэшируется, а bulk_create не шлёт сигналов.
+        cache.clear()
+
     def common_response(self):
         # Загружаем главную страницу.
         response = self.client.get(self.HOME_URL)
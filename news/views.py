@@ -1,11 +1,33 @@
+from datetime import timedelta
+from itertools import islice
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest, ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import (
+    Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
 from django.views import generic
 
-from .forms import CommentForm
+from yanews.routers import read_from_primary
+
+from .cache import (
+    forget_comment_fragment, get_feed_cache, get_feed_page_key,
+    get_feed_version, remember_feed_items, render_comment_fragments
+)
+from .forms import DUPLICATE_WARNING, CommentForm
+from .ingest import get_comment_buffer
+from .leaderboard import add_comments, get_leaders, remove_comments
 from .models import Comment, News
+from .pagination import get_comment_page, iter_comments
+from .search import search_news
 
 
 class NewsList(generic.ListView):
@@ -13,27 +35,138 @@ class NewsList(generic.ListView):
     model = News
     template_name = 'news/home.html'
 
+    def get(self, request, *args, **kwargs):
+        """
+        Отдаём страницу из кэша, не обращаясь к базе.
+
+        Кэш сбрасывается сигналами при изменении новостей и комментариев.
+        """
+        cache = get_feed_cache()
+        version = get_feed_version()
+        key = get_feed_page_key(version, request.user)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        # Отстающая реплика не должна попасть в кэш под новой версией.
+        read_from_primary()
+        response = super().get(request, *args, **kwargs)
+
+        def cache_response(response):
+            remember_feed_items(version, self.object_list)
+            cache.set(key, response.content, settings.NEWS_FEED_CACHE_TIMEOUT)
+
+        response.add_post_render_callback(cache_response)
+        return response
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def get_context_data(self, **kwargs):
+        """
+        Самые обсуждаемые новости читаются из готовой таблицы
+        LeaderboardEntry. В закэшированной странице блок обновляется
+        вместе с лентой, то есть не реже NEWS_FEED_CACHE_TIMEOUT.
+        """
+        context = super().get_context_data(**kwargs)
+        period = settings.LEADERBOARD_HOME_PERIOD
+        context['most_discussed'] = get_leaders(
+            period, settings.LEADERBOARD_SIZE
+        )
+        context['most_discussed_title'] = (
+            settings.LEADERBOARD_PERIOD_TITLES[period]
+        )
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        """
+        Берём на одну новость больше страницы: так известно,
+        есть ли следующая страница, без подсчёта всех совпадений.
+
+        Страниц не больше SEARCH_MAX_PAGE: OFFSET не пропускает строки
+        даром, глубокая страница ранжирует почти все совпадения.
+        """
+        self.query = self.request.GET.get('q', '').strip()
+        try:
+            self.page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise BadRequest('Некорректный номер страницы.')
+        if not 1 <= self.page <= settings.SEARCH_MAX_PAGE:
+            raise Http404('Нет такой страницы результатов.')
+        size = settings.SEARCH_RESULTS_ON_PAGE
+        results = search_news(self.query, (self.page - 1) * size, size + 1)
+        self.has_next_page = (
+            len(results) > size and self.page < settings.SEARCH_MAX_PAGE
+        )
+        return results[:size]
+
+    def get_page_url(self, page):
+        return reverse('news:search') + '?' + urlencode(
+            {'q': self.query, 'page': page}
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        if self.page > 1:
+            context['previous_page_url'] = self.get_page_url(self.page - 1)
+        if self.has_next_page:
+            context['next_page_url'] = self.get_page_url(self.page + 1)
+        return context
+
+
+def get_comments_url(news, cursor):
+    """Страница комментариев к новости после курсора cursor."""
+    return (
+        reverse('news:detail', kwargs={'pk': news.pk})
+        + f'?after={cursor}#comments'
+    )
+
+
+class CommentPageMixin:
+    """Добавляет в контекст страницу комментариев к self.object."""
+
+    def get_context_data(self, **kwargs):
+        """
+        Комментарии выводятся страницами фиксированного размера.
+
+        Следующая страница запрашивается по курсору из параметра after.
+        Тела комментариев берутся из кэша, а ссылки на правку
+        и удаление, зависящие от читателя, добавляет шаблон.
+        """
+        context = super().get_context_data(**kwargs)
+        try:
+            comments, next_cursor = get_comment_page(
+                self.object,
+                settings.COMMENTS_COUNT_ON_PAGE,
+                self.request.GET.get('after'),
+                with_authors=False,
+            )
+        except ValueError as error:
+            raise BadRequest(error)
+        context['comments'] = render_comment_fragments(comments)
+        if next_cursor is not None:
+            context['next_comments_url'] = get_comments_url(
+                self.object, next_cursor
+            )
+        return context
 
 
-class NewsDetail(generic.DetailView):
+class NewsDetail(CommentPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +175,78 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsThread(generic.DetailView):
+    """
+    Все комментарии к новости одной страницей.
+
+    Ответ отдаётся потоком: шапка страницы уходит клиенту сразу,
+    а комментарии читаются курсором базы и рендерятся пачками
+    по COMMENTS_STREAM_CHUNK_SIZE. Время до первого байта и память
+    на запрос не зависят от числа комментариев.
+
+    Запросы, сделанные при отдаче потока, RequestTimingMiddleware
+    уже не видит: ответ читается после выхода из цепочки middleware.
+
+    Под ASGI Django 3.2 читает потоковый ответ в цикле событий, где ORM
+    недоступен, и страница обрывалась бы после шапки. Там она
+    рендерится ещё в пуле потоков и отдаётся обычным ответом, но
+    только с первой пачкой комментариев: держать в памяти все
+    комментарии популярной новости нельзя. Дальше читатель идёт
+    по страницам NewsDetail.
+    """
+    model = News
+    template_name = 'news/thread.html'
+    comments_marker = '<!-- comments -->'
+
+    def get_object(self, queryset=None):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
+
+    def render_to_response(self, context, **response_kwargs):
+        page = render_to_string(self.template_name, context, self.request)
+        head, _, tail = page.partition(self.comments_marker)
+        if isinstance(self.request, ASGIRequest):
+            comments, next_cursor = get_comment_page(
+                self.object,
+                settings.COMMENTS_STREAM_CHUNK_SIZE,
+                with_authors=False,
+            )
+            next_comments_url = (
+                None if next_cursor is None
+                else get_comments_url(self.object, next_cursor)
+            )
+            return HttpResponse(
+                head + self.render_comments(comments, next_comments_url)
+                + tail,
+                **response_kwargs
+            )
+        return StreamingHttpResponse(
+            self.stream(head, tail), **response_kwargs
+        )
+
+    def stream(self, head, tail):
+        yield head
+        size = settings.COMMENTS_STREAM_CHUNK_SIZE
+        comments = iter_comments(self.object, size)
+        chunk = list(islice(comments, size))
+        # Пустую первую пачку шаблон покажет как «никто ничего не написал».
+        yield self.render_comments(chunk)
+        while len(chunk) == size:
+            chunk = list(islice(comments, size))
+            if chunk:
+                yield self.render_comments(chunk)
+        yield tail
+
+    def render_comments(self, comments, next_comments_url=None):
+        return render_to_string('includes/comment_list.html', {
+            'comments': render_comment_fragments(comments),
+            'next_comments_url': next_comments_url,
+            'user': self.request.user,
+        })
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -51,20 +254,66 @@ class NewsComment(
     form_class = CommentForm
     template_name = 'news/detail.html'
 
-    def post(self, request, *args, **kwargs):
-        self.object = self.get_object()
-        return super().post(request, *args, **kwargs)
-
     def form_valid(self, form):
+        """
+        Комментарий пишется сразу или, если включён буфер
+        (COMMENT_INGEST), ставится в очередь на пакетную запись.
+        """
         comment = form.save(commit=False)
-        comment.news = self.object
+        comment.news_id = self.kwargs['pk']
         comment.author = self.request.user
-        comment.save()
+        if self.is_recent_duplicate(comment):
+            form.add_error('text', ValidationError(
+                DUPLICATE_WARNING, code='duplicate'
+            ))
+            return self.form_invalid(form)
+        comment_buffer = get_comment_buffer()
+        if comment_buffer is None:
+            self.save_comment(comment)
+        elif News.objects.filter(pk=comment.news_id).exists():
+            comment_buffer.add(comment)
+        else:
+            raise Http404('Новость не найдена.')
         return super().form_valid(form)
 
+    def is_recent_duplicate(self, comment):
+        """
+        Тот же текст от того же автора или к той же новости
+        за последние COMMENT_DUPLICATE_WINDOW секунд.
+        """
+        window = settings.COMMENT_DUPLICATE_WINDOW
+        if window is None:
+            return False
+        return Comment.objects.recent_duplicates(
+            comment.news_id,
+            comment.author_id,
+            comment.text,
+            timezone.now() - timedelta(seconds=window),
+        ).exists()
+
+    @transaction.atomic
+    def save_comment(self, comment):
+        """
+        Новость не загружаем: её существование проверяет UPDATE счётчика.
+
+        Если новости нет, транзакция откатывается вместе с комментарием.
+        """
+        if not News.objects.filter(
+            pk=comment.news_id
+        ).change_comment_count(1):
+            raise Http404('Новость не найдена.')
+        comment.save()
+        add_comments({comment.news_id: 1})
+
+    def form_invalid(self, form):
+        """Новость загружается только для повторного показа формы."""
+        self.object = self.get_object()
+        return super().form_invalid(form)
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.kwargs['pk']}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +332,16 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен, а id новости хранится в нём самом."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +349,37 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    @transaction.atomic
+    def form_valid(self, form):
+        """
+        Обновляем только текст, не переписывая остальные поля строки.
+
+        save() меняет версию комментария, и страница новости отрендерит
+        его заново; фрагмент прежней версии удаляется из кэша.
+        """
+        forget_comment_fragment(self.object)
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=form.Meta.fields)
+        News.objects.filter(pk=self.object.news_id).touch()
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        """
+        Уменьшаем счётчик, только если комментарий действительно удалён:
+        при двух одновременных запросах строку удалит лишь один из них.
+        """
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        deleted, _ = self.object.delete()
+        if deleted:
+            News.objects.filter(
+                pk=self.object.news_id
+            ).change_comment_count(-deleted)
+            remove_comments([(self.object.news_id, self.object.created)])
+        return HttpResponseRedirect(success_url)
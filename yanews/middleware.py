@@ -0,0 +1,328 @@
+"""
+Замеры каждого запроса: число SQL-запросов, время в базе,
+в представлении и на рендеринг шаблона.
+
+Результат отдаётся в заголовке Server-Timing и пишется в лог
+yanews.timing одной JSON-строкой. Настраивается словарём
+REQUEST_TIMING в settings; если ENABLED ложно, Django исключает
+middleware из цепочки и она ничего не стоит.
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+from .routers import REPLICA, RoutingState, routing_state
+
+logger = logging.getLogger('yanews.timing')
+
+# Замеры текущего запроса. Под ASGI запрос выполняется частями
+# в цикле событий и в пуле потоков, а переменная контекста
+# переходит вместе с ним.
+current_timing = ContextVar('current_timing', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Обёртка execute_wrapper: считает запрос в замеры текущего запроса."""
+    timing = current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing(execute, sql, params, many, context)
+
+
+def install_query_counter():
+    """
+    Ставит count_query на соединения текущего потока, один раз.
+
+    Обёртка ставится в начало списка: connection.execute_wrapper
+    снимает свою обёртку с конца и постоянную не заденет.
+    """
+    for connection in connections.all():
+        if count_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, count_query)
+
+
+class AsyncCapableMiddleware:
+    """
+    Middleware для синхронной и асинхронной цепочки обработки.
+
+    Синхронную middleware Django под ASGI обходит переходом в пул
+    потоков и обратно на каждом запросе, и асинхронные представления
+    ничего бы не выигрывали. Подклассы переопределяют sync_call
+    и async_call; process_view и остальные хуки Django сам вызывает
+    в пуле потоков.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django 3.2 узнаёт асинхронную middleware,
+            # как и MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.async_call(request)
+        return self.sync_call(request)
+
+    def sync_call(self, request):
+        return self.get_response(request)
+
+    async def async_call(self, request):
+        return await self.get_response(request)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление сделало больше SQL-запросов, чем ему разрешено."""
+
+
+class RequestTiming:
+    """Счётчики одного запроса; служит и обёрткой execute_wrapper."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.view = 0.0
+        self.template = 0.0
+        self.total = 0.0
+        self.view_started = None
+        self.template_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql += time.perf_counter() - started
+
+    def as_server_timing(self):
+        return ', '.join((
+            f'db;dur={self.sql * 1000:.2f};desc="{self.queries} queries"',
+            f'view;dur={self.view * 1000:.2f}',
+            f'tpl;dur={self.template * 1000:.2f}',
+            f'total;dur={self.total * 1000:.2f}',
+        ))
+
+
+class RequestTimingMiddleware(AsyncCapableMiddleware):
+
+    def __init__(self, get_response):
+        config = settings.REQUEST_TIMING
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.query_budgets = config.get('QUERY_BUDGETS', {})
+        self.raise_on_budget = config.get('RAISE_ON_BUDGET', False)
+
+    def sync_call(self, request):
+        install_query_counter()
+        timing = request.timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.finish(request, response)
+
+    async def async_call(self, request):
+        # Соединения принадлежат потокам пула: счётчик на них
+        # ставит process_view, который Django вызывает там же.
+        timing = request.timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.finish(request, response)
+
+    def finish(self, request, response):
+        timing = request.timing
+        finished = time.perf_counter()
+        timing.total = finished - timing.started
+        if timing.view_started is not None and not timing.view:
+            timing.view = finished - timing.view_started
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        response['Server-Timing'] = timing.as_server_timing()
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': timing.queries,
+            'sql_ms': round(timing.sql * 1000, 2),
+            'view_ms': round(timing.view * 1000, 2),
+            'template_ms': round(timing.template * 1000, 2),
+            'total_ms': round(timing.total * 1000, 2),
+        }))
+        self.check_query_budget(view_name, request.method, timing)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        install_query_counter()
+        request.timing.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """
+        Вызывается последним перед рендерингом шаблона:
+        middleware стоит первой в MIDDLEWARE.
+        """
+        timing = request.timing
+        timing.template_started = time.perf_counter()
+        if timing.view_started is not None:
+            timing.view = timing.template_started - timing.view_started
+
+        def finish_template(response):
+            timing.template = time.perf_counter() - timing.template_started
+
+        response.add_post_render_callback(finish_template)
+        return response
+
+    def get_query_budget(self, view_name, method):
+        """
+        Бюджет маршрута для метода запроса.
+
+        Ключ (имя маршрута, метод) задаёт бюджет для конкретного метода,
+        просто имя маршрута — только для GET и HEAD: запись обходится
+        дороже чтения и проверяется отдельно.
+        """
+        budget = self.query_budgets.get((view_name, method))
+        if budget is None and method in ('GET', 'HEAD'):
+            budget = self.query_budgets.get(view_name)
+        return budget
+
+    def check_query_budget(self, view_name, method, timing):
+        budget = self.get_query_budget(view_name, method)
+        if budget is None or timing.queries <= budget:
+            return
+        message = (
+            f'{method} {view_name}: {timing.queries} SQL-запросов '
+            f'при бюджете {budget}'
+        )
+        if self.raise_on_budget:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """
+    Включает чтение с реплики для GET и HEAD и закрепляет клиента
+    за основной базой после записи (см. yanews/routers.py).
+    """
+
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def sync_call(self, request):
+        state = self.get_state(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin_client(response, state)
+
+    async def async_call(self, request):
+        state = self.get_state(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin_client(response, state)
+
+    def get_state(self, request):
+        return RoutingState(
+            use_replica=request.method in ('GET', 'HEAD')
+            and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+        )
+
+    def pin_client(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class RateLimitMiddleware(AsyncCapableMiddleware):
+    """
+    Ограничивает частоту POST-запросов к маршрутам из RATE_LIMIT['ROUTES'].
+
+    У каждого маршрута два «ведра с токенами» в кэше: по пользователю
+    (если он вошёл) и по IP. Запрос проходит, только если в обоих есть
+    токен; иначе сразу отдаётся 429 — до формы и до запросов к базе.
+    Ведро вмещает BURST токенов и пополняется на RATE за PERIOD секунд.
+    Чтение и запись ведра не атомарны: при гонке пройти может
+    на пару запросов больше, зато проверка стоит один get_many и один
+    set_many.
+    """
+
+    def __init__(self, get_response):
+        config = settings.RATE_LIMIT
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.cache = caches[config.get('CACHE_ALIAS', 'default')]
+        self.routes = config['ROUTES']
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'POST':
+            return None
+        view_name = request.resolver_match.view_name
+        limit = self.routes.get(view_name)
+        if limit is None:
+            return None
+        # ASGI-сервер на unix-сокете не передаёт адрес клиента (client
+        # в scope), и такие запросы делят одно общее ведро.
+        address = request.META.get('REMOTE_ADDR') or 'unknown'
+        keys = [f'ratelimit:{view_name}:ip:{address}']
+        if request.user.is_authenticated:
+            keys.append(f'ratelimit:{view_name}:user:{request.user.pk}')
+        retry_after = self.take_token(keys, limit)
+        if retry_after is None:
+            return None
+        response = HttpResponse(
+            'Слишком много запросов, попробуйте позже.', status=429
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    def take_token(self, keys, limit):
+        """
+        Берёт по токену из каждого ведра. Возвращает None, если запрос
+        можно пропустить, иначе — через сколько секунд повторить.
+        """
+        capacity = limit.get('BURST', limit['RATE'])
+        refill = limit['RATE'] / limit['PERIOD']
+        now = time.time()
+        stored = self.cache.get_many(keys)
+        buckets = {}
+        for key in keys:
+            tokens, updated = stored.get(key, (capacity, now))
+            buckets[key] = min(capacity, tokens + (now - updated) * refill)
+        lowest = min(buckets.values())
+        if lowest < 1:
+            return math.ceil((1 - lowest) / refill)
+        timeout = math.ceil(capacity / refill)
+        self.cache.set_many(
+            {key: (tokens - 1, now) for key, tokens in buckets.items()},
+            timeout,
+        )
+        return None
@@ -0,0 +1,64 @@
+"""
+Чтение с реплики, запись в основную базу.
+
+Реплика используется только в безопасных запросах (GET, HEAD):
+ReplicaRoutingMiddleware включает её на время такого запроса.
+Всё остальное, в том числе чтение внутри POST, идёт в основную базу.
+После записи клиент получает куку и на REPLICA_PIN_SECONDS
+закрепляется за основной базой, чтобы видеть свои изменения,
+даже если реплика отстаёт.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+
+class RoutingState:
+    """Маршрутизация одного запроса; общая для всех потоков запроса."""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+def read_from_primary():
+    """До конца запроса читать из основной базы, а не с реплики."""
+    state = routing_state.get()
+    if state is not None:
+        state.use_replica = False
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is not None and state.use_replica
+            and REPLICA in settings.DATABASES
+        ):
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        """Записав, запрос дальше читает только из основной базы."""
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+            state.use_replica = False
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Объекты из основной базы и с реплики — одни и те же данные."""
+        if {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Реплика получает схему вместе с данными из основной базы."""
+        return db == PRIMARY
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.middleware.RequestTimingMiddleware',
+    'yanews.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -28,10 +31,51 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanews.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
 
+# Замеры запросов: заголовок Server-Timing и лог yanews.timing.
+# QUERY_BUDGETS ограничивает число SQL-запросов: ключ «имя маршрута»
+# действует для GET и HEAD, ключ (имя маршрута, метод) — для метода.
+# Бюджеты посчитаны для холодного кэша: сессия и пользователь читаются
+# из базы. При превышении пишется предупреждение; QueryBudgetExceeded
+# с RAISE_ON_BUDGET включают только тесты (yanews/test_runner.py):
+# в живом запросе исключение пришло бы уже после записи в базу.
+REQUEST_TIMING = {
+    'ENABLED': True,
+    'QUERY_BUDGETS': {
+        'news:home': 4,
+        'news:detail': 6,
+        # Проверка повтора, счётчик, INSERT и таблица самых обсуждаемых.
+        ('news:detail', 'POST'): 8,
+        'news:edit': 3,
+        ('news:edit', 'POST'): 7,
+        'news:delete': 3,
+        ('news:delete', 'POST'): 8,
+        'news:api_feed': 2,
+        'news:api_comments': 3,
+        'news:search': 4,
+        # Под WSGI комментарии читаются уже при отдаче потока, под ASGI —
+        # в представлении: комментарии, архив и их авторы.
+        'news:thread': 4,
+    },
+    'RAISE_ON_BUDGET': False,
+}
+
+# Ограничение частоты POST по пользователю и IP (RateLimitMiddleware):
+# ведро на BURST запросов, которое пополняется на RATE за PERIOD секунд.
+RATE_LIMIT = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'ROUTES': {
+        'news:detail': {'RATE': 10, 'PERIOD': 60, 'BURST': 5},
+        'news:edit': {'RATE': 10, 'PERIOD': 60, 'BURST': 5},
+        'users:signup': {'RATE': 5, 'PERIOD': 60 * 60, 'BURST': 3},
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -51,16 +95,59 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# SQLite с WAL и PRAGMA для одновременной записи (yanews/sqlite/base.py).
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanews.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Реплика для страниц чтения (yanews/routers.py) — файл, в который
+# копируется основная база. Без DATABASE_REPLICA_NAME всё читается
+# из основной базы.
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DATABASE_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+# Сколько секунд после записи клиент читает из основной базы.
+REPLICA_PIN_COOKIE = 'pin_primary'
+REPLICA_PIN_SECONDS = 10
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# На сервере с несколькими процессами кэш должен быть общим: задайте
+# адреса Memcached через запятую (нужен пакет pymemcache).
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ['MEMCACHED_LOCATION'].split(','),
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
+# Сессия и пользователь читаются из кэша, а не из базы на каждый запрос.
+# Кэш должен быть общим для всех процессов сервера (Redis, Memcached):
+# с LocMemCache процессы не узнают об изменениях друг друга, и после
+# смены пароля старая сессия живёт в других процессах до истечения кэша.
+# manage.py check --deploy (news/checks.py) такую настройку не пропустит.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['news.auth.CachedModelBackend']
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -73,6 +160,17 @@ USE_L10N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+# Bootstrap и прочие сторонние файлы лежат в static/vendor:
+# страница не зависит от CDN.
+STATICFILES_DIRS = [BASE_DIR / 'static']
+# Имена с хэшем содержимого и сжатые копии .gz/.br (yanews/storage.py).
+STATICFILES_STORAGE = 'yanews.storage.CompressedManifestStaticFilesStorage'
+# Тестам манифест не нужен (yanews/test_runner.py).
+TEST_RUNNER = 'yanews.test_runner.TestRunner'
+# Раздавать собранную статику самим Django (yanews/static.py),
+# если перед ним нет веб-сервера, который делает это сам.
+STATIC_SERVE = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -80,3 +178,55 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+NEWS_FEED_CACHE_ALIAS = 'default'
+NEWS_FEED_CACHE_TIMEOUT = 60 * 5
+
+# Асинхронные версии главной и страницы новости (news/async_views.py).
+NEWS_ASYNC_READ_VIEWS = os.environ.get('NEWS_ASYNC_READ_VIEWS') == '1'
+
+COMMENTS_COUNT_ON_PAGE = 50
+# Сколько комментариев читать из базы и рендерить за раз
+# на потоковой странице со всеми комментариями новости.
+COMMENTS_STREAM_CHUNK_SIZE = 200
+
+# Комментарии к новостям старше этого числа дней команда
+# archive_comments переносит в архивную таблицу.
+COMMENT_ARCHIVE_AFTER_DAYS = 30
+
+# Комментарий с тем же текстом (см. text_fingerprint) от того же
+# автора или к той же новости за столько секунд отклоняется.
+# None — не проверять.
+COMMENT_DUPLICATE_WINDOW = 60 * 60
+
+# Буферизованная запись комментариев (news/ingest.py). MODE: None —
+# писать сразу, 'memory' — буфер в памяти процесса, 'table' — очередь
+# в таблице PendingComment, которая переживает перезапуск.
+COMMENT_INGEST = {
+    'MODE': os.environ.get('COMMENT_INGEST_MODE') or None,
+    'BATCH_SIZE': 100,
+    'MAX_DELAY': 1.0,
+}
+
+# Отрендеренные комментарии; ключ меняется при правке комментария,
+# а срок ограничивает устаревание имени автора.
+COMMENT_FRAGMENT_CACHE_ALIAS = 'default'
+COMMENT_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+SEARCH_RESULTS_ON_PAGE = 10
+# Дальние страницы поиска отдают 404: уточнить запрос полезнее.
+SEARCH_MAX_PAGE = 50
+
+# Периоды таблицы самых обсуждаемых новостей (news/leaderboard.py)
+# в днях. Команда rebuild_leaderboard должна запускаться по расписанию
+# (например, раз в 10 минут): она убирает комментарии, вышедшие
+# за границу периода.
+LEADERBOARD_PERIODS = {'day': 1, 'week': 7}
+# Заголовок блока на главной для каждого периода.
+LEADERBOARD_PERIOD_TITLES = {
+    'day': 'Обсуждают сегодня',
+    'week': 'Обсуждают на этой неделе',
+}
+# Период и размер блока самых обсуждаемых на главной.
+LEADERBOARD_HOME_PERIOD = 'week'
+LEADERBOARD_SIZE = 5
@@ -0,0 +1,65 @@
+"""
+SQLite, настроенный для одновременных запросов.
+
+Подключается как ENGINE = 'yanews.sqlite'. Кроме обычных OPTIONS
+бэкенд понимает два ключа:
+
+- pragmas — PRAGMA, выполняемые при каждом подключении; по умолчанию
+  DEFAULT_PRAGMAS, значение None отключает PRAGMA из списка;
+- transaction_mode — чем начинается transaction.atomic: DEFERRED,
+  IMMEDIATE или EXCLUSIVE. С IMMEDIATE транзакция сразу берёт
+  блокировку на запись, и конкурент ждёт busy_timeout, а не получает
+  «database is locked» при попытке повысить блокировку.
+
+Подключения переиспользуются между запросами через CONN_MAX_AGE.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот.
+    'journal_mode': 'WAL',
+    # В режиме WAL fsync нужен только при контрольной точке.
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {
+            **DEFAULT_PRAGMAS, **options.get('pragmas', {})
+        }
+        self.transaction_mode = options.get(
+            'transaction_mode', 'DEFERRED'
+        ).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'Неизвестный transaction_mode: {self.transaction_mode}. '
+                f'Допустимые значения: {", ".join(TRANSACTION_MODES)}.'
+            )
+
+    def get_connection_params(self):
+        """Свои ключи OPTIONS не передаются в sqlite3.connect()."""
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if value is not None:
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
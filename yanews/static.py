@@ -0,0 +1,66 @@
+"""
+Раздача собранной статики, если перед Django нет веб-сервера для неё.
+
+Файлы с хэшем в имени не меняются никогда, поэтому кэшируются
+на год с immutable: браузер не перепроверяет их даже при обновлении
+страницы. Если клиент принимает сжатые ответы, отдаётся готовая
+копия .br или .gz из collectstatic.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Файлы без хэша могут измениться при следующем деплое.
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых (q=0)."""
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.partition(';')
+        name, _, value = params.partition('=')
+        if name.strip() == 'q':
+            try:
+                if float(value) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+@require_safe
+def serve_static(request, path):
+    # Выход за пределы STATIC_ROOT safe_join превращает в ответ 400.
+    full_path = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден.')
+    content_type = mimetypes.guess_type(full_path)[0]
+    accepted = accepted_encodings(request)
+    encoding = None
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(full_path + suffix):
+            encoding = coding
+            full_path += suffix
+            break
+    response = FileResponse(
+        open(full_path, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    hashed_names = staticfiles_storage.hashed_files.values()
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if path in hashed_names
+        else DEFAULT_CACHE_CONTROL
+    )
+    return response
@@ -0,0 +1,78 @@
+"""
+Хранилище статики: имена с хэшем содержимого и сжатые копии.
+
+collectstatic раскладывает файлы под именами вида
+bootstrap.min.3a1f….css и рядом кладёт .gz и, если установлен
+Brotli, .br. Сжатие детерминировано: одинаковые исходники дают
+побайтно одинаковые файлы (см. команду check_static).
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Что имеет смысл сжимать: картинки и шрифты уже сжаты.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.txt', '.json', '.html', '.xml',
+)
+# Файлы меньше этого размера сжатие почти не уменьшает.
+MIN_COMPRESS_SIZE = 256
+
+
+def gzip_compress(data):
+    # mtime=0: в заголовок gzip не попадает время сборки.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+ENCODINGS = (('.br', brotli_compress), ('.gz', gzip_compress))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        """
+        Без collectstatic манифеста нет: в разработке статика
+        отдаётся под исходными именами.
+
+        Вне DEBUG пустой манифест — ошибка сборки, как и у
+        ManifestStaticFilesStorage: иначе сервер молча отдавал бы
+        файлы без хэша в именах.
+        """
+        if not self.hashed_files and settings.DEBUG:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                yield from self.compress(name)
+
+    def compress(self, name):
+        """Пишет сжатые копии, если они меньше исходного файла."""
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compress in ENCODINGS:
+            if compress is brotli_compress and brotli is None:
+                continue
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name, name + suffix, True
@@ -0,0 +1,35 @@
+"""
+Запуск тестов manage.py test; те же настройки включает
+news/pytest_tests/conftest.py.
+
+Тесты не запускают collectstatic, а без манифеста хранилище статики
+вне DEBUG выбрасывает ошибку. Поэтому страницы в тестах рендерятся
+с обычным StaticFilesStorage; сборку статики проверяет test_static.
+Превышение бюджета SQL-запросов в тестах — ошибка, а не запись в лог.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.StaticFilesStorage'
+)
+
+
+def get_test_settings():
+    return override_settings(
+        STATICFILES_STORAGE=TEST_STATICFILES_STORAGE,
+        REQUEST_TIMING={**settings.REQUEST_TIMING, 'RAISE_ON_BUDGET': True},
+    )
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = get_test_settings()
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.forms import UserCreationForm
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.views.generic import CreateView
 
+from .static import serve_static
+
 urlpatterns = [
     path('', include('news.urls')),
     path('admin/', admin.site.urls),
 ]
 
+# В DEBUG статику из исходных каталогов отдаёт runserver.
+if settings.STATIC_SERVE and not settings.DEBUG:
+    urlpatterns += [
+        re_path(
+            rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$',
+            serve_static,
+        ),
+    ]
+
 auth_urls = ([
     path(
         'login/',